@@ -2,8 +2,13 @@ from .model_builder import BrickModelBuilder
 from .get_metadata import BuildingMetadataLoader
 from .utils import *
 from .parse_points import add_points
+from .classify_points import PointClassifier, classify_points
+from .point_index import PointIndex, SQLitePointIndex, PointRecord
+from .unit_normalizer import UnitNormalizer
 from .create_metadata_survey import SurveyGenerator
 from .read_metadata_survey import SurveyReader
+from .survey_container import pack_survey, unpack_survey
 from .unit_conversion import *
 from.brick_to_grafana import BrickToGrafana
+from .grafana_uploader import DashboardUploader
 from .generate_shacl import SHACLHandler
\ No newline at end of file
@@ -0,0 +1,94 @@
+# Precompiled Brick class hierarchy, so the Brick ontology doesn't have to be downloaded and parsed to find subclasses
+# The closure table lists every (class, superclass) pair of the Point, Equipment and Location hierarchies,
+# including indirect superclasses, by local name in the Brick namespace.
+# A table for the default version ships with the package (see _resource_path in unit_conversion), other versions are
+# computed once from the ontology and cached in the user's cache directory.
+import csv
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+from rdflib import Graph, URIRef, RDFS
+from .namespaces import BRICK
+from .unit_conversion import _resource_path
+
+BRICK_VERSION = "1.4.4"
+CLOSURE_ROOTS = ['Point', 'Equipment', 'Location']
+
+def _closure_file_name(version):
+    return f"class_closure_{version}.csv"
+
+def _cache_dir() -> Path:
+    return Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'BrickModelInterface'
+
+def _ontology_url(version):
+    # brickschema.org serves each minor version, e.g. 1.4.4 -> 1.4
+    return f"https://brickschema.org/schema/{'.'.join(version.split('.')[:2])}/Brick.ttl"
+
+def compute_class_closure(ontology: Graph, roots: Iterable[str] = CLOSURE_ROOTS) -> Dict[str, Set[str]]:
+    """Map each Brick class below one of the roots to all of its Brick superclasses"""
+    parents = {}
+    for subclass, superclass in ontology.subject_objects(RDFS.subClassOf):
+        if isinstance(subclass, URIRef) and isinstance(superclass, URIRef) \
+                and subclass.startswith(BRICK) and superclass.startswith(BRICK):
+            parents.setdefault(subclass[len(BRICK):], set()).add(superclass[len(BRICK):])
+
+    ancestors = {}
+    def get_ancestors(brick_class):
+        if brick_class not in ancestors:
+            ancestors[brick_class] = set()
+            for parent in parents.get(brick_class, ()):
+                ancestors[brick_class] |= {parent} | get_ancestors(parent)
+        return ancestors[brick_class]
+
+    roots = set(roots)
+    return {brick_class: get_ancestors(brick_class) for brick_class in sorted(parents) if roots & get_ancestors(brick_class)}
+
+def save_class_closure(closure: Dict[str, Set[str]], path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['class', 'superclass'])
+        for brick_class, superclasses in sorted(closure.items()):
+            writer.writerows((brick_class, superclass) for superclass in sorted(superclasses))
+
+def _read_class_closure(file) -> Dict[str, FrozenSet[str]]:
+    closure = {}
+    for row in csv.DictReader(file):
+        closure.setdefault(row['class'], set()).add(row['superclass'])
+    return {brick_class: frozenset(superclasses) for brick_class, superclasses in closure.items()}
+
+@lru_cache(maxsize=None)
+def load_class_closure(version: str = BRICK_VERSION, ontology_source: Optional[str] = None) -> Dict[str, FrozenSet[str]]:
+    """
+    Load the class -> superclasses closure of a Brick version
+
+    Args:
+        version: Brick version, the shipped table is used for BRICK_VERSION
+        ontology_source: Path or URL of the Brick ontology, only parsed when no shipped or cached table exists.
+            Defaults to the ontology of the version on brickschema.org.
+    """
+    shipped = _resource_path('brick', _closure_file_name(version))
+    if shipped.is_file():
+        with shipped.open('r', encoding='utf-8') as f:
+            return _read_class_closure(f)
+    cached = _cache_dir() / _closure_file_name(version)
+    if not cached.is_file():
+        print(f"Computing Brick {version} class hierarchy. This is only done once...")
+        ontology = Graph()
+        ontology.parse(ontology_source or _ontology_url(version), format='turtle')
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        save_class_closure(compute_class_closure(ontology), cached)
+    with open(cached, 'r', encoding='utf-8') as f:
+        return _read_class_closure(f)
+
+def get_subclasses(closure: Dict[str, FrozenSet[str]], superclass: str) -> Set[str]:
+    """All classes that are the superclass or below it"""
+    return {superclass} | {brick_class for brick_class, superclasses in closure.items() if superclass in superclasses}
+
+if __name__ == '__main__':
+    # Regenerate the shipped table: python -m BrickModelInterface.brick_hierarchy path/to/Brick.ttl version
+    ontology = Graph()
+    ontology.parse(sys.argv[1], format='turtle')
+    version = sys.argv[2] if len(sys.argv) > 2 else BRICK_VERSION
+    save_class_closure(compute_class_closure(ontology), Path(__file__).parent / 'brick' / _closure_file_name(version))
@@ -2,16 +2,22 @@
 from grafanalib.core import (
     Dashboard, TimeSeries, GaugePanel,
     Target, GridPos, SqlTarget,
+    Template, Templating, Repeat,
     OPS_FORMAT
 )
 from buildingmotif.namespaces import bind_prefixes
 from .namespaces import BRICK, UNIT, QUDT, HPF, A, RDF, RDFS, REF
-from rdflib import Graph, URIRef, Variable
+from rdflib import Graph, URIRef
 from typing import List, Dict, Optional, Any
 import json
+import re
+import pandas as pd
 import requests
+from collections import namedtuple
 import yaml
-from .utils import get_prefixes
+from .utils import get_prefixes, rewrite_brick_inverse_query
+from .brick_hierarchy import BRICK_VERSION, load_class_closure, get_subclasses
+from .grafana_uploader import DashboardUploader
 from grafanalib._gen import DashboardEncoder
 
 DEFAULT_QUERY = """
@@ -26,75 +32,390 @@ DEFAULT_QUERY = """
                 $__timeFilter(ts) 
             ORDER BY 1"""
 
+# Aggregated DEFAULT_QUERY, one row per $__interval bucket so long time ranges don't return every reading
+AGGREGATED_QUERY = """
+            SELECT 
+                $__timeGroupAlias(ts, $__interval), 
+                {aggregation}(CAST(value_string AS FLOAT)) AS "{point_type}"
+            FROM 
+                data 
+            WHERE 
+                topic_id in (select topic_id from topics where topic_name = '{point_id}')
+            AND 
+                $__timeFilter(ts) 
+            GROUP BY 1
+            ORDER BY 1"""
+
+# One query per panel: topic ids are resolved in a single join and each row is labeled with its point type,
+# which Grafana splits into one series per metric value. Points aggregated differently are combined with UNION ALL.
+PANEL_QUERY = """
+            SELECT 
+                data.ts AS "time", 
+                CASE topics.topic_name {series} END AS metric,
+                CAST(data.value_string AS FLOAT) AS value
+            FROM 
+                data 
+                JOIN topics ON topics.topic_id = data.topic_id
+            WHERE 
+                topics.topic_name IN ({topic_names})
+            AND 
+                $__timeFilter(data.ts)"""
+
+AGGREGATED_PANEL_QUERY = """
+            SELECT 
+                $__timeGroup(data.ts, $__interval) AS "time", 
+                CASE topics.topic_name {series} END AS metric,
+                {aggregation}(CAST(data.value_string AS FLOAT)) AS value
+            FROM 
+                data 
+                JOIN topics ON topics.topic_id = data.topic_id
+            WHERE 
+                topics.topic_name IN ({topic_names})
+            AND 
+                $__timeFilter(data.ts)
+            GROUP BY 1, 2"""
+
+# Templated dashboards repeat one panel per selected zone or equipment. A points table per aggregation maps each topic
+# to its panel and point type, so only the topics of the repeated panel's variable value are read.
+TEMPLATED_POINTS = """
+                {name}(topic_name, panel, metric) AS (VALUES {points})"""
+
+TEMPLATED_QUERY = """
+            SELECT 
+                data.ts AS "time", 
+                points.metric,
+                CAST(data.value_string AS FLOAT) AS value
+            FROM 
+                {name} AS points 
+                JOIN topics ON topics.topic_name = points.topic_name
+                JOIN data ON data.topic_id = topics.topic_id
+            WHERE 
+                points.panel IN (${{{variable}:sqlstring}})
+            AND 
+                $__timeFilter(data.ts)"""
+
+# Values of a zone or equipment variable, limited to the sites selected in the site variable.
+# Panels of unknown sites ('') are always listed.
+TEMPLATED_PANELS = """
+            WITH panels(site, panel) AS (VALUES {panels})
+            SELECT DISTINCT panel FROM panels WHERE site = '' OR site IN (${{site:sqlstring}}) ORDER BY 1"""
+
+AGGREGATED_TEMPLATED_QUERY = """
+            SELECT 
+                $__timeGroup(data.ts, $__interval) AS "time", 
+                points.metric,
+                {aggregation}(CAST(data.value_string AS FLOAT)) AS value
+            FROM 
+                {name} AS points 
+                JOIN topics ON topics.topic_name = points.topic_name
+                JOIN data ON data.topic_id = topics.topic_id
+            WHERE 
+                points.panel IN (${{{variable}:sqlstring}})
+            AND 
+                $__timeFilter(data.ts)
+            GROUP BY 1, 2"""
+
+AGGREGATIONS = ['avg', 'min', 'max']
+
+# Historian DDL for the data/topics schema the generated queries read. The covering index answers the
+# per-topic time range scans from the index alone, SQLite has no INCLUDE so value_string is a key column there.
+DATA_INDEX_DDL = {
+    'postgresql': "CREATE INDEX IF NOT EXISTS data_topic_id_ts_idx ON data (topic_id, ts) INCLUDE (value_string);",
+    'sqlite': "CREATE INDEX IF NOT EXISTS data_topic_id_ts_idx ON data (topic_id, ts, value_string);",
+}
+TOPICS_INDEX_DDL = "CREATE INDEX IF NOT EXISTS topics_topic_name_idx ON topics (topic_name, topic_id);"
+
+# Rollups hold avg/min/max of every point of a panel per time bucket, rebuilt each time the script runs
+ROLLUP_QUERY = """
+WITH points(topic_name, metric) AS (VALUES {points})
+SELECT 
+    {bucket} AS ts, 
+    points.metric,
+    avg(CAST(data.value_string AS FLOAT)) AS avg_value,
+    min(CAST(data.value_string AS FLOAT)) AS min_value,
+    max(CAST(data.value_string AS FLOAT)) AS max_value
+FROM 
+    points
+    JOIN topics ON topics.topic_name = points.topic_name
+    JOIN data ON data.topic_id = topics.topic_id
+GROUP BY 1, 2"""
+
+ROLLUP_DDL = {
+    ('postgresql', 'view'): "DROP MATERIALIZED VIEW IF EXISTS {name};\nCREATE MATERIALIZED VIEW {name} AS{query};",
+    ('postgresql', 'table'): "DROP TABLE IF EXISTS {name};\nCREATE TABLE {name} AS{query};",
+    ('sqlite', 'table'): "DROP TABLE IF EXISTS {name};\nCREATE TABLE {name} AS{query};",
+}
+ROLLUP_INDEX_DDL = "CREATE INDEX IF NOT EXISTS {index} ON {name} (metric, ts);"
+
+ROLLUP_BUCKETS = {
+    'postgresql': {'hour': "date_trunc('hour', data.ts)", 'day': "date_trunc('day', data.ts)"},
+    'sqlite': {'hour': "strftime('%Y-%m-%d %H:00:00', data.ts)", 'day': "strftime('%Y-%m-%d 00:00:00', data.ts)"},
+}
+
+# point: one target per point with DEFAULT_QUERY, panel: one target per panel with PANEL_QUERY
+QUERY_MODES = ['point', 'panel']
+
+# A point selected for a dashboard: family is the requested point type (e.g. Sensor) the point's class falls under,
+# panel the local name of the zone or equipment the point belongs to, panel_type 'zone' or 'equipment'
+# and site the local name of the panel's site (None if it isn't known)
+DashboardPoint = namedtuple('DashboardPoint', ['point', 'topic', 'point_type', 'family', 'panel', 'panel_type', 'site'],
+                            defaults=[None])
+
 DEFAULT_SPARQL_REF = """
         ?point ref:hasExternalReference/ref:hasTopic ?point_id .
 """
 
+def _sql_string(value):
+    # quoted SQL string literal, topic names come from the model
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _group_by_panel(points: List[DashboardPoint]) -> Dict[str, Dict[str, DashboardPoint]]:
+    # one series per point type in each panel
+    panel_points = {}
+    for point in points:
+        panel_points.setdefault(point.panel, {})[point.point_type] = point
+    return panel_points
+
+def _group_by_aggregation(points: List[DashboardPoint], aggregations: Optional[Dict[str, str]] = None):
+    # None groups the points that are queried raw
+    aggregations = aggregations or {}
+    points_by_aggregation = {}
+    for point in points:
+        points_by_aggregation.setdefault(aggregations.get(point.family), []).append(point)
+    return points_by_aggregation
+
+INVENTORY_COLUMNS = ['point', 'topic', 'point_type', 'panel', 'panel_type', 'site']
+
+def write_point_inventory(points: List[DashboardPoint], output_file):
+    """Write dashboard points to a JSON or Parquet inventory, by file extension"""
+    inventory = pd.DataFrame([point._asdict() for point in points], columns=DashboardPoint._fields)[INVENTORY_COLUMNS]
+    if str(output_file).endswith('.parquet'):
+        inventory.to_parquet(output_file, index=False)
+    else:
+        inventory.to_json(output_file, orient='records', indent=2)
+
+def read_point_inventory(inventory_file) -> List[Dict[str, str]]:
+    """Read a JSON or Parquet inventory written by write_point_inventory"""
+    if str(inventory_file).endswith('.parquet'):
+        inventory = pd.read_parquet(inventory_file)
+    else:
+        inventory = pd.read_json(inventory_file, orient='records', dtype=False)
+    # inventories written before sites were added have no site column
+    inventory = inventory.reindex(columns=INVENTORY_COLUMNS).astype(object)
+    return inventory.where(inventory.notna(), None).to_dict('records')
+
 class BrickToGrafana:
     """Class to handle conversion of Brick models to Grafana dashboards"""
     
-    def __init__(self, grafana_server: str, grafana_api_key: str, datasource, ttl_path: str):
+    def __init__(self, grafana_server: str, grafana_api_key: str, datasource, ttl_path: Optional[str] = None,
+                 virtual_inverse_relations: bool = False, brick_version: str = BRICK_VERSION,
+                 inventory: Optional[str] = None):
         """Initialize with Grafana connection details
         
         Args:
             grafana_server: URL of the Grafana server
             grafana_api_key: API key with admin privileges
+            virtual_inverse_relations: Set if the model was saved with only canonical relation directions, so
+                inverse predicates in queries are rewritten. The dashboard queries only use canonical predicates and
+                work on such models either way, so this only matters for a custom sparql_ref using inverse predicates.
+            brick_version: Brick version of the class hierarchy used to find point and zone classes.
+                The hierarchy of the default version ships with the package, others are computed once and cached.
+            inventory: Point inventory written by export_inventory (JSON, or Parquet if pyarrow is installed),
+                used instead of ttl_path so the model doesn't have to be loaded
         """
         self.grafana_server = grafana_server
         self.grafana_api_key = grafana_api_key
         self.datasource = datasource
-        self.g = Graph(store = 'Oxigraph')
-        # self.g = Graph()
-        self.g.parse('https://brickschema.org/schema/Brick.ttl', format='turtle')
-        bind_prefixes(self.g)
-        self.g.parse(ttl_path, format="turtle")
-        self.prefixes = get_prefixes(self.g)
+        self.virtual_inverse_relations = virtual_inverse_relations
+        # subclasses are looked up in the precompiled class hierarchy, so the Brick ontology isn't loaded into the graph
+        self.class_closure = load_class_closure(brick_version)
+        self.inventory = None
+        if inventory is not None:
+            self.g = None
+            self.inventory = read_point_inventory(inventory)
+        elif ttl_path is not None:
+            self.g = Graph(store = 'Oxigraph')
+            # self.g = Graph()
+            bind_prefixes(self.g)
+            self.g.parse(ttl_path, format="turtle")
+            self.prefixes = get_prefixes(self.g)
+        else:
+            raise ValueError("Either ttl_path or inventory must be given")
         self.panels = []
         self.dashboard = None
+        self._point_families = {}
 
       
-    def _get_points(self, point_types, sparql_ref = DEFAULT_SPARQL_REF) -> Dict[str, List[str]]:
-        
-        all_points = f"""
-                {self.prefixes}
-                SELECT ?point ?point_id ?point_type ?zone_panel ?other_panel
-                WHERE {{
-                    ?point a ?point_type .
-                    ?point_type rdfs:subClassOf* ?point_super_type .
-                    ?zone a/rdfs:subClassOf* brick:Zone .
-                    ?zone_panel brick:feeds? ?zone ;
-                            brick:hasPoint ?point . 
-                    OPTIONAL {{
-                        ?other_panel brick:hasPoint ?point . 
-                        FILTER (?other_panel != ?zone_panel)
-                    }}
-                    {sparql_ref}
-                    FILTER (?point_super_type IN ({','.join(['brick:'+ point for point in point_types])})) .
-            }}"""
-        point_results = self.g.query(all_points)
-        return point_results
-
-    def _get_sql(self, point_id, point_type, sql_query = DEFAULT_QUERY):
+    def _values(self, variable, superclasses):
+        # VALUES clause with every Brick class below the superclasses, in place of an rdfs:subClassOf* path
+        brick_classes = sorted(set().union(*(get_subclasses(self.class_closure, superclass) for superclass in superclasses)))
+        return f"VALUES ?{variable} {{ {' '.join('brick:' + brick_class for brick_class in brick_classes)} }}"
+
+    def _query(self, query):
+        if self.virtual_inverse_relations:
+            query = rewrite_brick_inverse_query(query)
+        return self.g.query(f"{self.prefixes}\n{query}")
+
+    def _get_point_family(self, point_type, point_types):
+        """First of point_types that the Brick class is, or is a subclass of, looked up in the class closure"""
+        key = (point_type, tuple(point_types))
+        if key not in self._point_families:
+            superclasses = self.class_closure.get(point_type, frozenset())
+            self._point_families[key] = next(
+                (family for family in point_types if family == point_type or family in superclasses), None
+            )
+        return self._point_families[key]
+
+    def _get_points(self, point_types, sparql_ref = DEFAULT_SPARQL_REF) -> List[DashboardPoint]:
+        """Points of the requested families whose owner is a zone or equipment feeding a zone
+
+        The queries are plain triple patterns. Point families come from the class closure, one dictionary lookup per point class.
+        With an inventory the points are read from it instead of the model.
+        """
+        if self.inventory is not None:
+            return self._get_inventory_points(point_types)
+        zones = {row[0] for row in self._query(f"""
+            SELECT ?zone WHERE {{
+                {self._values('zone_type', ['Zone'])}
+                ?zone a ?zone_type .
+            }}""")}
+        # zones belong to the site they are part of, in models without those relations to the only site
+        sites = [row[0] for row in self._query("SELECT ?site WHERE { ?site a brick:Site . }")]
+        zone_sites = {zone: sites[0] if len(sites) == 1 else None for zone in zones}
+        for site, zone in self._query("SELECT ?site ?zone WHERE { ?site a brick:Site . ?site brick:hasPart+ ?zone . }"):
+            if zone in zone_sites:
+                zone_sites[zone] = site
+        # zones and the equipment directly feeding them get panels, equipment is in the site of the zone it feeds
+        panel_owners = dict(zone_sites)
+        for equipment, zone in self._query("SELECT ?equipment ?zone WHERE { ?equipment brick:feeds ?zone . }"):
+            if zone in zones:
+                panel_owners.setdefault(equipment, zone_sites[zone])
+
+        points = []
+        point_results = self._query(f"""
+            SELECT ?point ?point_id ?point_type ?owner WHERE {{
+                ?owner brick:hasPoint ?point .
+                ?point a ?point_type .
+                {sparql_ref}
+            }}""")
+        for point, point_id, point_type, owner in point_results:
+            if owner not in panel_owners or not point_type.startswith(BRICK):
+                continue
+            point_type = point_type[len(BRICK):]
+            family = self._get_point_family(point_type, point_types)
+            if family is None:
+                continue
+            panel = self.g.compute_qname(owner)[-1]
+            panel_type = 'zone' if owner in zones else 'equipment'
+            site = panel_owners[owner]
+            site = None if site is None else self.g.compute_qname(site)[-1]
+            points.append(DashboardPoint(str(point), str(point_id), point_type, family, panel, panel_type, site))
+        return sorted(set(points), key=lambda point: (point.panel, point.point_type, point.topic))
+
+    def _get_inventory_points(self, point_types) -> List[DashboardPoint]:
+        points = []
+        for point in self.inventory:
+            family = self._get_point_family(point['point_type'], point_types)
+            if family is not None:
+                points.append(DashboardPoint(point['point'], point['topic'], point['point_type'], family,
+                                             point['panel'], point['panel_type'], point['site']))
+        return points
+
+    def export_inventory(self, output_file):
+        """
+        Write the point inventory of the model: point, topic, Brick point type and the zone or equipment panel of
+        every point of a zone or equipment feeding a zone. BrickToGrafana(inventory=output_file) then creates
+        dashboards without loading the model.
+
+        Args:
+            output_file: .json file, or .parquet file if pyarrow is installed
+        """
+        write_point_inventory(self._get_points(point_types=['Point']), output_file)
+
+    def _get_sql(self, point_id, point_type, sql_query = DEFAULT_QUERY, aggregation = None):
+        if aggregation is not None:
+            return AGGREGATED_QUERY.format(point_id=point_id, point_type=point_type, aggregation=aggregation)
         return sql_query.format(point_id=point_id, point_type=point_type)
 
-    def create_dashboard(self, title, point_types = ['Sensor','Setpoint','Command','Status']):
-        """Create a Grafana dashboard from a Brick model"""
+    def _get_panel_sql(self, points: List[DashboardPoint], aggregations: Optional[Dict[str, str]] = None):
+        """One query for all points of a panel, with a metric column holding each row's point type
+
+        Args:
+            points: Points of the panel
+            aggregations: Maps point families to the aggregation of their buckets, other families are queried raw
+        """
+        selects = []
+        for aggregation, aggregated_points in _group_by_aggregation(points, aggregations).items():
+            series = ' '.join(f"WHEN {_sql_string(point.topic)} THEN {_sql_string(point.point_type)}" for point in aggregated_points)
+            topic_names = ', '.join(_sql_string(point.topic) for point in aggregated_points)
+            if aggregation is None:
+                selects.append(PANEL_QUERY.format(series=series, topic_names=topic_names))
+            else:
+                selects.append(AGGREGATED_PANEL_QUERY.format(series=series, topic_names=topic_names, aggregation=aggregation))
+        return "\n            UNION ALL".join(selects) + "\n            ORDER BY 1"
+
+    def _get_templated_sql(self, points: List[DashboardPoint], variable, aggregations: Optional[Dict[str, str]] = None):
+        """One query for the points of all panels of a variable, filtered to the panel selected by the variable"""
+        tables = []
+        selects = []
+        for aggregation, aggregated_points in _group_by_aggregation(points, aggregations).items():
+            name = 'raw_points' if aggregation is None else f"{aggregation}_points"
+            values = ', '.join(
+                f"({_sql_string(point.topic)}, {_sql_string(point.panel)}, {_sql_string(point.point_type)})"
+                for point in aggregated_points
+            )
+            tables.append(TEMPLATED_POINTS.format(name=name, points=values))
+            if aggregation is None:
+                selects.append(TEMPLATED_QUERY.format(name=name, variable=variable))
+            else:
+                selects.append(AGGREGATED_TEMPLATED_QUERY.format(name=name, variable=variable, aggregation=aggregation))
+        return ("\n            WITH" + ",".join(tables) + "\n            UNION ALL".join(selects)
+                + "\n            ORDER BY 1")
+
+    def _get_aggregations(self, aggregation, point_types) -> Dict[str, str]:
+        # a single aggregation applies to every point family
+        if aggregation is None:
+            return {}
+        if isinstance(aggregation, str):
+            aggregation = {point_type: aggregation for point_type in point_types}
+        for family, family_aggregation in aggregation.items():
+            if family_aggregation is not None and family_aggregation not in AGGREGATIONS:
+                raise ValueError(f"Invalid aggregation '{family_aggregation}' for {family}, must be one of {AGGREGATIONS}")
+        return aggregation
+
+    def create_dashboard(self, title, point_types = ['Sensor','Setpoint','Command','Status'], query_mode = 'point',
+                         aggregation = None):
+        """Create a Grafana dashboard from a Brick model
+
+        Args:
+            title: Dashboard title
+            point_types: Brick classes of the points to plot, each point is plotted under the first class it falls under
+            query_mode: 'point' for one query per point, 'panel' for one query per panel,
+                which resolves all topics of the panel in one join and so puts less load on the historian
+            aggregation: 'avg', 'min' or 'max' to aggregate every point into $__interval buckets, or a dict
+                mapping point types (e.g. {'Sensor': 'avg', 'Command': 'max'}) to their aggregation.
+                Points of other types, and all points when not set, are queried raw, which suits short time ranges.
+        """
         # TODO: Consider defining rows for the dashboard by zone/hvac, then having different panels for different groups of points
         # TODO: eg: Row 1 = HVAC1, Panel 1: Sensors and Setpoints, Panel 2: Commands and Statuses, Panel 3: Power Readings
-        point_results = self._get_points(point_types=point_types)
+        if query_mode not in QUERY_MODES:
+            raise ValueError(f"Invalid query_mode '{query_mode}', must be one of {QUERY_MODES}")
+        aggregations = self._get_aggregations(aggregation, point_types)
+        panel_points = _group_by_panel(self._get_points(point_types=point_types))
+
         panel_dict_list = {}
-        for binding in point_results.bindings:
-            panel_name = binding[Variable('zone_panel')] if binding[Variable('zone_panel')] else binding[Variable('other_panel')]
-            panel_name = self.g.compute_qname(panel_name)[-1]
-            point_type=self.g.compute_qname(binding[Variable('point_type')])[-1]
-            query =  self._get_sql(binding[Variable('point_id')], point_type)
-            if panel_name not in panel_dict_list:
-                panel_dict_list[panel_name] = {
-                    'title': panel_name,
-                    'query_dict': {point_type:query}
-                }
+        for panel_name, points_by_type in panel_points.items():
+            if query_mode == 'panel':
+                query_dict = {'A': self._get_panel_sql(list(points_by_type.values()), aggregations)}
             else:
-                panel_dict_list[panel_name]['query_dict'][point_type] = query
+                query_dict = {
+                    point_type: self._get_sql(point.topic, point_type, aggregation=aggregations.get(point.family))
+                    for point_type, point in points_by_type.items()
+                }
+            panel_dict_list[panel_name] = {
+                'title': panel_name,
+                'query_dict': query_dict
+            }
 
         y= 0
         panels = []
@@ -107,11 +428,108 @@ class BrickToGrafana:
             description="Zone-based dashboard generated from Brick model",
             tags=['brick'],
             timezone="browser",
-            panels=self.panels,
+            panels=panels,
         ).auto_panel_ids()
+        # panels of the last created dashboard
+        self.panels = panels
         self.dashboard = dashboard
         return dashboard
     
+    def get_ddl(self, point_types = ['Sensor','Setpoint','Command','Status'], dialect = 'postgresql',
+                rollup = None, rollup_interval = 'hour') -> str:
+        """DDL script with the historian indexes the dashboard queries need, and optionally rollups per panel
+
+        Args:
+            point_types: Brick classes of the points in the rollups, as passed to create_dashboard
+            dialect: 'postgresql' or 'sqlite'
+            rollup: None for indexes only, 'view' for a materialized view (PostgreSQL only) or 'table' for a rollup
+                table per zone and equipment panel, holding avg, min and max of each point type per bucket
+            rollup_interval: 'hour' or 'day' buckets of the rollups
+        """
+        if dialect not in DATA_INDEX_DDL:
+            raise ValueError(f"Invalid dialect '{dialect}', must be one of {list(DATA_INDEX_DDL)}")
+        if rollup is not None and (dialect, rollup) not in ROLLUP_DDL:
+            raise ValueError(f"Invalid rollup '{rollup}' for {dialect}, must be one of "
+                             f"{[kind for ddl_dialect, kind in ROLLUP_DDL if ddl_dialect == dialect]}")
+        if rollup_interval not in ROLLUP_BUCKETS[dialect]:
+            raise ValueError(f"Invalid rollup_interval '{rollup_interval}', must be one of {list(ROLLUP_BUCKETS[dialect])}")
+        statements = [DATA_INDEX_DDL[dialect], TOPICS_INDEX_DDL]
+        if rollup is not None:
+            for panel, points_by_type in _group_by_panel(self._get_points(point_types=point_types)).items():
+                table = 'rollup_' + re.sub(r'\W', '_', panel)
+                values = ', '.join(f"({_sql_string(point.topic)}, {_sql_string(point_type)})" for point_type, point in points_by_type.items())
+                query = ROLLUP_QUERY.format(bucket=ROLLUP_BUCKETS[dialect][rollup_interval], points=values)
+                statements.append(ROLLUP_DDL[dialect, rollup].format(name=f'"{table}"', query=query))
+                statements.append(ROLLUP_INDEX_DDL.format(index=f'"{table}_metric_ts_idx"', name=f'"{table}"'))
+        return "\n\n".join(statements) + "\n"
+
+    def write_ddl(self, output_file, **kwargs):
+        """Write the DDL script of get_ddl to a file"""
+        with open(output_file, 'w') as f:
+            f.write(self.get_ddl(**kwargs))
+
+    def create_templated_dashboard(self, title, point_types = ['Sensor','Setpoint','Command','Status'], aggregation = None):
+        """Create one Grafana dashboard with site, zone and equipment template variables
+
+        Instead of a panel per zone and equipment, a zone panel and an equipment panel repeat for each value selected
+        in the zone and equipment variables, so only the selected zones and equipment are queried.
+        When the sites of the points are known, the zone and equipment variables are queried from the datasource
+        and only list the zones and equipment of the sites selected in the site variable.
+
+        Args:
+            title: Dashboard title
+            point_types: Brick classes of the points to plot, each point is plotted under the first class it falls under
+            aggregation: Aggregation of every point, or dict mapping point types to their aggregation, see create_dashboard
+        """
+        aggregations = self._get_aggregations(aggregation, point_types)
+        panel_points = _group_by_panel(self._get_points(point_types=point_types))
+        all_points = [point for points_by_type in panel_points.values() for point in points_by_type.values()]
+        sites = sorted({point.site for point in all_points if point.site is not None})
+        templates = []
+        if sites:
+            templates.append(Template(
+                name='site', label='Site', type='custom', query=','.join(sites),
+                default=sites[0], multi=True, includeAll=True,
+            ))
+        panels = []
+        y = 0
+        for variable in ['zone', 'equipment']:
+            points = [point for point in all_points if point.panel_type == variable]
+            if not points:
+                continue
+            panel_names = sorted({point.panel for point in points})
+            if sites:
+                panel_sites = sorted({(point.site or '', point.panel) for point in points})
+                query = TEMPLATED_PANELS.format(panels=', '.join(
+                    f"({_sql_string(site)}, {_sql_string(panel)})" for site, panel in panel_sites
+                ))
+                # refreshed by Grafana whenever the site selection changes
+                templates.append(Template(
+                    name=variable, label=variable.capitalize(), type='query', dataSource=self.datasource,
+                    query=query, default=panel_names[0], multi=True, includeAll=True,
+                ))
+            else:
+                templates.append(Template(
+                    name=variable, label=variable.capitalize(), type='custom', query=','.join(panel_names),
+                    default=panel_names[0], multi=True, includeAll=True,
+                ))
+            panel = self._create_timeseries_panel(f"${variable}", {'A': self._get_templated_sql(points, variable, aggregations)}, y)
+            panel.repeat = Repeat(direction='v', variable=variable)
+            panels.append(panel)
+            y += 10
+
+        dashboard = Dashboard(
+            title=title,
+            description="Zone-based dashboard generated from Brick model",
+            tags=['brick'],
+            timezone="browser",
+            templating=Templating(list=templates),
+            panels=panels,
+        ).auto_panel_ids()
+        self.panels = panels
+        self.dashboard = dashboard
+        return dashboard
+
     def _create_timeseries_panel(self, title: str, sql_query_dict,y):
         targets = []
         for name, query in sql_query_dict.items():
@@ -164,7 +582,6 @@ class BrickToGrafana:
             ]
           }]
         
-        self.panels.append(panel)
         return panel
     
     def upload_dashboard(self, overwrite: bool = True,
@@ -178,6 +595,13 @@ class BrickToGrafana:
         """
         json_data = self._get_dashboard_json(self.dashboard, overwrite, message)
         self._upload_to_grafana(json_data)
+    def get_uploader(self, **kwargs) -> DashboardUploader:
+        """Batch uploader for this Grafana server, see DashboardUploader for the options
+
+        Example: uploader.upload([grafana.create_dashboard(title) for title in titles])
+        """
+        return DashboardUploader(self.grafana_server, self.grafana_api_key, **kwargs)
+
     def _add_datasource(self):
         """ Add a datasource to Grafana. 
         Currently not implemented. Depends significantly on networking setup of Grafana
@@ -0,0 +1,248 @@
+# Generates the point mapping csv used by parse_points.add_points from VOLTTRON topic names
+# Rule based: the last segment of each topic (the point name) is split into tokens with a trie over
+# a vocabulary of common BAS abbreviations, and the most specific rule whose tokens are all present wins.
+import re
+import pandas as pd
+from typing import Dict, Iterable, Optional
+
+TEMPERATURE = 'temperature'
+PERCENT = '%'
+ENTHALPY = 'BTU_TH-PER-LB'
+
+# Vocabulary of the trie tokenizer, mapped to the canonical tokens used by the rules
+TOKEN_SYNONYMS = {
+    'temperature': ('temperature',), 'temp': ('temperature',), 'tmp': ('temperature',),
+    'setpoint': ('setpoint',), 'setpt': ('setpoint',), 'stpt': ('setpoint',), 'spt': ('setpoint',), 'sp': ('setpoint',),
+    'cooling': ('cooling',), 'cool': ('cooling',), 'clg': ('cooling',),
+    'heating': ('heating',), 'heat': ('heating',), 'htg': ('heating',),
+    'occupied': ('occupied',), 'occ': ('occupied',),
+    'unoccupied': ('unoccupied',), 'unocc': ('unoccupied',),
+    'occupancy': ('occupancy',),
+    'zone': ('zone',), 'zn': ('zone',), 'room': ('zone',), 'rm': ('zone',),
+    'air': ('air',),
+    'supply': ('supply',), 'sa': ('supply', 'air'), 'sat': ('supply', 'air', 'temperature'),
+    'discharge': ('discharge',), 'da': ('discharge', 'air'), 'dat': ('discharge', 'air', 'temperature'),
+    'return': ('return',), 'ra': ('return', 'air'), 'rat': ('return', 'air', 'temperature'),
+    'mixed': ('mixed',), 'mix': ('mixed',), 'ma': ('mixed', 'air'), 'mat': ('mixed', 'air', 'temperature'),
+    'outside': ('outside',), 'outdoor': ('outside',), 'oa': ('outside', 'air'), 'oat': ('outside', 'air', 'temperature'),
+    'zat': ('zone', 'air', 'temperature'),
+    'humidity': ('humidity',), 'hum': ('humidity',), 'rh': ('humidity',),
+    'co2': ('co2',),
+    'damper': ('damper',), 'dmpr': ('damper',), 'dpr': ('damper',),
+    'valve': ('valve',), 'vlv': ('valve',),
+    'position': ('position',), 'pos': ('position',),
+    'fan': ('fan',),
+    'speed': ('speed',), 'spd': ('speed',),
+    'status': ('status',), 'sts': ('status',), 'state': ('status',),
+    'command': ('command',), 'cmd': ('command',),
+    'alarm': ('alarm',), 'alm': ('alarm',),
+    'power': ('power',), 'pwr': ('power',), 'kw': ('power',),
+    'energy': ('energy',), 'kwh': ('energy',),
+    'pressure': ('pressure',), 'press': ('pressure',),
+    'static': ('static',),
+    'enthalpy': ('enthalpy',), 'enth': ('enthalpy',),
+    'deadband': ('deadband',), 'db': ('deadband',),
+    'flow': ('flow',), 'cfm': ('air', 'flow'),
+    'stage': ('stage',), 'stg': ('stage',),
+    'mode': ('mode',),
+    'start': ('start',), 'stop': ('stop',),
+    'on': ('on',), 'off': ('off',),
+    'availability': ('availability',), 'avail': ('availability',),
+}
+
+# (tokens, brick point class, unit, point is on the zone rather than the equipment)
+# When several rules match, the one with the most tokens wins, then the first in the table.
+POINT_RULES = [
+    (('temperature',), 'Temperature Sensor', TEMPERATURE, False),
+    (('air', 'temperature'), 'Air Temperature Sensor', TEMPERATURE, False),
+    (('zone', 'temperature'), 'Zone Air Temperature Sensor', TEMPERATURE, True),
+    (('zone', 'air', 'temperature'), 'Zone Air Temperature Sensor', TEMPERATURE, True),
+    (('supply', 'air', 'temperature'), 'Supply Air Temperature Sensor', TEMPERATURE, False),
+    (('discharge', 'air', 'temperature'), 'Discharge Air Temperature Sensor', TEMPERATURE, False),
+    (('return', 'air', 'temperature'), 'Return Air Temperature Sensor', TEMPERATURE, False),
+    (('mixed', 'air', 'temperature'), 'Mixed Air Temperature Sensor', TEMPERATURE, False),
+    (('outside', 'temperature'), 'Outside Air Temperature Sensor', TEMPERATURE, False),
+    (('outside', 'air', 'temperature'), 'Outside Air Temperature Sensor', TEMPERATURE, False),
+    (('setpoint',), 'Setpoint', None, False),
+    (('temperature', 'setpoint'), 'Temperature Setpoint', TEMPERATURE, True),
+    (('zone', 'temperature', 'setpoint'), 'Zone Air Temperature Setpoint', TEMPERATURE, True),
+    (('cooling', 'setpoint'), 'Cooling Temperature Setpoint', TEMPERATURE, True),
+    (('cooling', 'temperature', 'setpoint'), 'Cooling Temperature Setpoint', TEMPERATURE, True),
+    (('zone', 'cooling', 'temperature', 'setpoint'), 'Zone Air Cooling Temperature Setpoint', TEMPERATURE, True),
+    (('heating', 'setpoint'), 'Heating Temperature Setpoint', TEMPERATURE, True),
+    (('heating', 'temperature', 'setpoint'), 'Heating Temperature Setpoint', TEMPERATURE, True),
+    (('zone', 'heating', 'temperature', 'setpoint'), 'Zone Air Heating Temperature Setpoint', TEMPERATURE, True),
+    (('occupied', 'cooling', 'setpoint'), 'Occupied Cooling Temperature Setpoint', TEMPERATURE, True),
+    (('occupied', 'heating', 'setpoint'), 'Occupied Heating Temperature Setpoint', TEMPERATURE, True),
+    (('unoccupied', 'cooling', 'setpoint'), 'Unoccupied Cooling Temperature Setpoint', TEMPERATURE, True),
+    (('unoccupied', 'heating', 'setpoint'), 'Unoccupied Heating Temperature Setpoint', TEMPERATURE, True),
+    (('deadband',), 'Temperature Deadband Setpoint', TEMPERATURE, True),
+    (('humidity',), 'Relative Humidity Sensor', PERCENT, False),
+    (('zone', 'humidity'), 'Zone Air Humidity Sensor', PERCENT, True),
+    (('outside', 'humidity'), 'Outside Air Humidity Sensor', PERCENT, False),
+    (('humidity', 'setpoint'), 'Humidity Setpoint', PERCENT, True),
+    (('co2',), 'CO2 Sensor', None, True),
+    (('damper',), 'Damper Position Command', PERCENT, False),
+    (('damper', 'position'), 'Damper Position Command', PERCENT, False),
+    (('valve',), 'Valve Position Command', PERCENT, False),
+    (('valve', 'position'), 'Valve Position Command', PERCENT, False),
+    (('fan', 'status'), 'Fan Status', None, False),
+    (('fan', 'command'), 'Fan Command', None, False),
+    (('fan', 'speed'), 'Fan Speed Command', PERCENT, False),
+    (('fan', 'speed', 'command'), 'Fan Speed Command', PERCENT, False),
+    (('occupancy',), 'Occupancy Sensor', None, True),
+    (('occupancy', 'status'), 'Occupancy Status', None, True),
+    (('occupancy', 'command'), 'Occupancy Command', None, True),
+    (('cooling', 'command'), 'Cooling Command', None, False),
+    (('cooling', 'stage'), 'Cooling Command', None, False),
+    (('heating', 'command'), 'Heating Command', None, False),
+    (('heating', 'stage'), 'Heating Command', None, False),
+    (('power',), 'Electric Power Sensor', None, False),
+    (('energy',), 'Energy Sensor', None, False),
+    (('pressure',), 'Pressure Sensor', None, False),
+    (('static', 'pressure'), 'Static Pressure Sensor', None, False),
+    (('supply', 'static', 'pressure'), 'Supply Air Static Pressure Sensor', None, False),
+    (('enthalpy',), 'Enthalpy Sensor', ENTHALPY, False),
+    (('outside', 'enthalpy'), 'Outside Air Enthalpy Sensor', ENTHALPY, False),
+    (('return', 'enthalpy'), 'Return Air Enthalpy Sensor', ENTHALPY, False),
+    (('air', 'flow'), 'Air Flow Sensor', None, False),
+    (('supply', 'air', 'flow'), 'Supply Air Flow Sensor', None, False),
+    (('mode',), 'Mode Status', None, False),
+    (('mode', 'command'), 'Mode Command', None, False),
+    (('start', 'stop'), 'Start Stop Command', None, False),
+    (('on', 'off'), 'On Off Status', None, False),
+    (('on', 'off', 'command'), 'On Off Command', None, False),
+    (('availability',), 'Availability Status', None, True),
+    (('status',), 'Status', None, False),
+    (('command',), 'Command', None, False),
+    (('alarm',), 'Alarm', None, False),
+]
+
+# 223 has no point classes, so points are typed by the kind of property their Brick class family describes
+S223_POINT_CLASSES = {
+    'Sensor': 'QuantifiableObservableProperty',
+    'Setpoint': 'QuantifiableActuatableProperty',
+    'Parameter': 'QuantifiableActuatableProperty',
+    'Command': 'QuantifiableActuatableProperty',
+    'Status': 'EnumeratedObservableProperty',
+    'Alarm': 'EnumeratedObservableProperty',
+}
+
+UNCLASSIFIED = {'brick': 'Point', 's223': 'Property'}
+
+_SET_POINT = re.compile(r'set[^A-Za-z0-9]?point', re.IGNORECASE)
+_CAMEL_CASE = re.compile(r'([a-z0-9])([A-Z])|([A-Z]+)([A-Z][a-z])')
+_SEPARATORS = re.compile(r'[^A-Za-z0-9]+')
+
+class PointClassifier:
+    """Classify VOLTTRON topic names into Brick or 223 point types and units"""
+
+    def __init__(self, ontology = 'brick', temperature_unit = 'F', rules = POINT_RULES, synonyms = TOKEN_SYNONYMS):
+        if ontology not in UNCLASSIFIED:
+            raise ValueError("Invalid ontology. Must be 'brick' or 's223'")
+        self.ontology = ontology
+        self.temperature_unit = temperature_unit
+        self.synonyms = synonyms
+        # character trie of the vocabulary, a word ends where the node has the '' key
+        self.trie = {}
+        for word in synonyms:
+            node = self.trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = word
+        self.rules = [(frozenset(tokens), point_class, unit, on_zone) for tokens, point_class, unit, on_zone in rules]
+        # inverted index from token to the rules using it
+        self.rules_by_token = {}
+        for rule_id, (tokens, _, _, _) in enumerate(self.rules):
+            for token in tokens:
+                self.rules_by_token.setdefault(token, []).append(rule_id)
+        # point names repeat across devices, so each is only classified once
+        self._cache = {}
+
+    def _segment(self, chunk):
+        """Split a lowercase chunk into vocabulary words with the fewest words, or None if it can't be split"""
+        # best[i] holds the fewest words covering chunk[:i]; digits can be skipped (e.g. the 1 in fan1)
+        best = [None] * (len(chunk) + 1)
+        best[0] = ()
+        for i in range(len(chunk)):
+            if best[i] is None:
+                continue
+            if chunk[i].isdigit() and (best[i + 1] is None or len(best[i]) < len(best[i + 1])):
+                best[i + 1] = best[i]
+            node = self.trie
+            for j in range(i, len(chunk)):
+                node = node.get(chunk[j])
+                if node is None:
+                    break
+                if '' in node and (best[j + 1] is None or len(best[i]) + 1 < len(best[j + 1])):
+                    best[j + 1] = best[i] + (node[''],)
+        return best[-1]
+
+    def tokenize(self, point_name):
+        """Return the canonical tokens of a point name"""
+        tokens = []
+        for chunk in _SEPARATORS.split(_CAMEL_CASE.sub(r'\1\3 \2\4', _SET_POINT.sub('setpoint', point_name))):
+            words = self._segment(chunk.lower())
+            if words is None:
+                # unknown chunks are kept whole and simply match no rule
+                tokens.append(chunk.lower())
+                continue
+            for word in words:
+                tokens.extend(self.synonyms[word])
+        return tokens
+
+    def classify_name(self, point_name):
+        """Return (point type, unit type, on zone) for a point name"""
+        result = self._cache.get(point_name)
+        if result is not None:
+            return result
+        tokens = set(self.tokenize(point_name))
+        hits = {}
+        for token in tokens:
+            for rule_id in self.rules_by_token.get(token, ()):
+                hits[rule_id] = hits.get(rule_id, 0) + 1
+        matches = [rule_id for rule_id, count in hits.items() if count == len(self.rules[rule_id][0])]
+        if matches:
+            rule_id = max(matches, key=lambda rule_id: (len(self.rules[rule_id][0]), -rule_id))
+            _, point_class, unit, on_zone = self.rules[rule_id]
+            if unit == TEMPERATURE:
+                unit = self.temperature_unit
+            if self.ontology == 's223':
+                point_class = S223_POINT_CLASSES.get(point_class.split(' ')[-1], UNCLASSIFIED['s223'])
+            result = (point_class, unit or '', on_zone)
+        else:
+            result = (None, '', False)
+        self._cache[point_name] = result
+        return result
+
+    def classify(self, topics: Iterable[str], zone_map: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Classify topics into a dataframe with the columns add_points reads
+
+        Args:
+            topics: VOLTTRON topic names, e.g. campus/building/rtu1/ZoneTemperature
+            zone_map: Maps a topic segment (e.g. a device name) to the zone_id of the topic.
+                Topics without a mapped segment get an empty zone_id to fill in by hand.
+        """
+        zone_map = zone_map or {}
+        rows = []
+        unclassified = 0
+        for topic in topics:
+            segments = topic.split('/')
+            point_class, unit, on_zone = self.classify_name(segments[-1])
+            if point_class is None:
+                point_class = UNCLASSIFIED[self.ontology]
+                unclassified += 1
+            zone_id = next((zone_map[segment] for segment in segments if segment in zone_map), '')
+            equipment = 'domainSpace' if on_zone else (segments[-2] if len(segments) > 1 else '')
+            rows.append((topic, zone_id, unit, point_class, equipment))
+        if unclassified:
+            print(f"{unclassified} topics could not be classified and were typed as {UNCLASSIFIED[self.ontology]}")
+        return pd.DataFrame(rows, columns=['topic_name', 'zone_id', 'unit_type', 'point type', 'equipment'])
+
+def classify_points(topics: Iterable[str], output_file = None, zone_map: Optional[Dict[str, str]] = None,
+                    ontology = 'brick', temperature_unit = 'F') -> pd.DataFrame:
+    """Classify topics and optionally write the mapping csv consumed by add_points"""
+    mapping_df = PointClassifier(ontology, temperature_unit).classify(topics, zone_map)
+    if output_file:
+        mapping_df.to_csv(output_file, index=False)
+    return mapping_df
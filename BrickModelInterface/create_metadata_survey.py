@@ -1,8 +1,45 @@
 # TODO: Provide SI or IP Units when survey is generated to set defaults for units
 import os
+import io
 import csv
 import json
+import pandas as pd
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .survey_container import write_survey_container
+
+# Columns of each survey table
+SITE_INFO_HEADERS = ["site_id", "timezone", "latitude", "longitude", "noaa_station","building_id"]
+SPACE_HEADERS = ["space_id", "zone_id", "area_value", "area_unit"]
+POINT_LIST_HEADERS = ["point_of", "point_type","point_name","quantitykind", "unit"]
+# could potentially delete zone_id from this.
+HVAC_HEADERS = [
+    "hvac_id", 
+    "zone_id", 
+    "cooling_capacity", 
+    "heating_capacity", 
+    "cooling_cop", 
+    "heating_cop"
+]
+# TODO: not sure these are the parameters needed at the stage of the metadata survey, should refine this
+ZONE_HEADERS = [
+    "tstat_id",
+    "zone_id",
+    "stage_count",
+    "setpoint_deadband",
+    "tolerance",
+    "active",
+    "resolution",
+    "temperature_unit",
+]
+WINDOW_HEADERS = [
+    "window_id",
+    "zone_id",
+    "area_value",
+    "azimuth_value",
+    "tilt_value",
+    "area_unit"
+]
 
 def validate_dict(input_dict):
     """
@@ -44,11 +81,13 @@ class SurveyGenerator:
             self.default_area_unit = "M2"
             self.default_temperature_unit = "DEG_C"
 
-    def easy_config(self, zone_space_window_list, output_path):
+    def easy_config(self, zone_space_window_list, output_path, packed=False):
         """Creates generic SMCB configuration with one HVAC unit per zone, filling in zone and space names and assuming one tstat per zone and one hvac per zone
         zone_space_window_list: list
             List with an entry per zone, in each entry is a touple with a list of the amount of spaces and windows
             e.g. 1 zone, with 2 spaces and 3 windows is [(2,3)]
+        packed: bool
+            Write a single survey container file instead of the directory tree, see generate_template
         """
         self.hvacs_feed_hvacs = {}
         self.hvacs_feed_zones = {}
@@ -69,7 +108,7 @@ class SurveyGenerator:
         
         # TODO: fill in the topology of the building and output file
         self.generate_template(self.hvacs_feed_hvacs, self.hvacs_feed_zones, self.zones_contain_spaces, self.zones_contain_windows,
-                               output_path)
+                               output_path, packed=packed)
                 
     def _create_directory_structure(self, base_path):
         """Create the directory structure for the Brick model"""
@@ -90,112 +129,98 @@ class SurveyGenerator:
                 raise FileExistsError(f"Subdirectory '{subdir_path}' already exists and is not empty. Please use a different path or clear the directory.")
             subdir_path.mkdir(parents=True, exist_ok=True)
 
+    def _write_csv(self, relative_path, headers, rows):
+        """Write a survey CSV with a single write call, rows are formatted in memory first"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        with open(self.base_dir / relative_path, 'w', newline='') as f:
+            f.write(buffer.getvalue())
+
+    def _site_info_rows(self):
+        return [[self.site_id, "", "", "", "", self.building_id]]  # Empty row for user input
+
     def _create_site_info_file(self):
         """Create site information CSV file"""
-        site_info = {
-            "headers": ["site_id", "timezone", "latitude", "longitude", "noaa_station","building_id"],
-            "file": "site_info.csv"
-        }
-        
-        with open(self.base_dir / site_info["file"], 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(site_info["headers"])
-            writer.writerow([self.site_id, "", "", "", "", self.building_id])  # Empty row for user input
+        self._write_csv("site_info.csv", SITE_INFO_HEADERS, self._site_info_rows())
+
 
+    def _space_rows(self, zone, spaces):
+        return [[space, zone, "", self.default_area_unit] for space in spaces]
 
     def _create_space_files(self, zones_contain_spaces):
         """Create zone-related CSV files"""
         for zone, spaces in zones_contain_spaces.items():
             # Create space file for each zone
-            space_headers = ["space_id", "zone_id", "area_value", "area_unit"]
-            with open(self.base_dir / "spaces" / f"{zone}_spaces.csv", 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(space_headers)
-                for space in spaces:
-                    writer.writerow([space, zone, "", self.default_area_unit])
+            self._write_csv(Path("spaces") / f"{zone}_spaces.csv", SPACE_HEADERS, self._space_rows(zone, spaces))
     
     def _create_point_list(self):
         """Create csv-file to which point list should be added"""
         # TODO: Note that point_type can be 
-        headers = ["point_of", "point_type","point_name","quantitykind", "unit"]
-        with open(self.base_dir / f"point_list.csv", 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
+        self._write_csv("point_list.csv", POINT_LIST_HEADERS, [])
 
 
+    def _hvac_rows(self, hvacs_feed_hvacs, hvacs_feed_zones):
+        # TODO: Not totally sure how the VRF was handled, should make sure this fits
+        rows = []
+        hvac_already_done = set()
+        for hvac, zones in hvacs_feed_zones.items():
+            hvac_already_done.add(hvac)
+            for zone in zones:
+                rows.append([hvac, zone, "", "", "", ""])
+        for hvac, hvacs in hvacs_feed_hvacs.items():
+            if hvac in hvac_already_done:
+                continue 
+            rows.append([hvac, "", "", "", ""])
+            hvac_already_done.add(hvac)
+            # Not adding feeds relationship for hvac to spreadsheet
+            # for fed_hvac in hvacs:
+            #     rows.append([hvac, fed_hvac, "", "", ""])
+            #     hvac_already_done.add(hvac)
+        return rows
+
     def _create_hvac_files(self,hvacs_feed_hvacs, hvacs_feed_zones):
         """Create HVAC-related CSV files"""
-        # could potentially delete zone_id from this. 
-        # TODO: Not totally sure how the VRF was handled, should make sure this fits
-        hvac_headers = [
-            "hvac_id", 
-            "zone_id", 
-            "cooling_capacity", 
-            "heating_capacity", 
-            "cooling_cop", 
-            "heating_cop"
-        ]
-        with open(self.base_dir / "hvac" / f"hvac_units.csv", 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(hvac_headers)
-            hvac_already_done = set()
-            for hvac, zones in hvacs_feed_zones.items():
-                hvac_already_done.add(hvac)
-                for zone in zones:
-                    writer.writerow([hvac, zone, "", "", "", ""])
-            for hvac, hvacs in hvacs_feed_hvacs.items():
-                if hvac in hvac_already_done:
-                    continue 
-                writer.writerow([hvac, "", "", "", ""])
-                hvac_already_done.add(hvac)
-                # Not adding feeds relationship for hvac to spreadsheet
-                # for fed_hvac in hvacs:
-                #     writer.writerow([hvac, fed_hvac, "", "", ""])
-                #     hvac_already_done.add(hvac)
+        self._write_csv(Path("hvac") / "hvac_units.csv", HVAC_HEADERS, self._hvac_rows(hvacs_feed_hvacs, hvacs_feed_zones))
         
     
 
     # Thermostats are directly linked to zones. Need to make sure this is correct
+    def _zone_rows(self, zones_contain_spaces):
+        return [[f"tstat_{zone}", zone, "", "", "","","",self.default_temperature_unit] for zone in zones_contain_spaces.keys()]
+
     def _create_zone_files(self, zones_contain_spaces):
         """Create zone/thermostat related files. Not sure which definition is preferred since these are 1:1 for this MPC (i think)"""
-        # TODO: not sure these are the parameters needed at the stage of the metadata survey, should refine this
-        tstat_headers = [
-            "tstat_id",
-            "zone_id",
-            "stage_count",
-            "setpoint_deadband",
-            "tolerance",
-            "active",
-            "resolution",
-            "temperature_unit",
-        ]
-        
-        with open(self.base_dir / "zones" / "zones.csv", 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(tstat_headers)
-            for zone in zones_contain_spaces.keys():
-                writer.writerow([f"tstat_{zone}", zone, "", "", "","","",self.default_temperature_unit])
+        self._write_csv(Path("zones") / "zones.csv", ZONE_HEADERS, self._zone_rows(zones_contain_spaces))
 
     # Windoes also linked to zones, not spaces. Should make sure that's correct
+    def _window_rows(self, zone, windows):
+        return [[window, zone, "","","", self.default_area_unit] for window in windows]
+
     def _create_window_files(self, zones_contain_windows):
         """Create window-related CSV files"""
-        window_headers = [
-            "window_id",
-            "zone_id",
-            "area_value",
-            "azimuth_value",
-            "tilt_value",
-            "area_unit"
-        ]
         for zone, windows in zones_contain_windows.items():
-            with open(self.base_dir / "windows" / f"{zone}_windows.csv", 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(window_headers)
-                for window in windows:
-                    writer.writerow([window, zone, "","","", self.default_area_unit])
-                
+            self._write_csv(Path("windows") / f"{zone}_windows.csv", WINDOW_HEADERS, self._window_rows(zone, windows))
+
+    def _create_survey_container(self, base_path, hvacs_feed_hvacs, hvacs_feed_zones, zones_contain_spaces, zones_contain_windows, config):
+        """Write the whole survey to one packed container file instead of the directory tree"""
+        self.base_dir = Path(base_path) / self.site_id / f"{self.building_id}.sqlite"
+        if self.base_dir.exists():
+            raise FileExistsError(f"File '{self.base_dir}' already exists. Please use a different path or remove the file.")
+        self.base_dir.parent.mkdir(parents=True, exist_ok=True)
+        tables = {
+            "site_info": (SITE_INFO_HEADERS, self._site_info_rows()),
+            "zones": (ZONE_HEADERS, self._zone_rows(zones_contain_spaces)),
+            "spaces": (SPACE_HEADERS, [row for zone, spaces in zones_contain_spaces.items() for row in self._space_rows(zone, spaces)]),
+            "windows": (WINDOW_HEADERS, [row for zone, windows in zones_contain_windows.items() for row in self._window_rows(zone, windows)]),
+            "hvac_units": (HVAC_HEADERS, self._hvac_rows(hvacs_feed_hvacs, hvacs_feed_zones)),
+            "point_list": (POINT_LIST_HEADERS, []),
+        }
+        write_survey_container(self.base_dir, tables, config)
+
 
-    def generate_template(self, hvacs_feed_hvacs, hvacs_feed_zones, zones_contain_spaces, zones_contain_windows, output_path):
+    def generate_template(self, hvacs_feed_hvacs, hvacs_feed_zones, zones_contain_spaces, zones_contain_windows, output_path, packed=False):
         """Generate the complete template structure
         
         hvacs_feed_hvacs: dict
@@ -214,6 +239,11 @@ class SurveyGenerator:
             Dictionary describing which zones contain which windows.
             e.g. {zone_1: [window1, window2]}
 
+        packed: bool
+            Write the survey as one SQLite container, {output_path}/{site_id}/{building_id}.sqlite, with one table
+            per entity instead of a directory with files per zone. SurveyReader reads either layout and
+            survey_container.pack_survey / unpack_survey convert between them.
+
         Currently, dictionaries are not handled recursively. 
         """
         # a little data validation 
@@ -222,15 +252,6 @@ class SurveyGenerator:
         validate_dict(zones_contain_spaces)
         validate_dict(zones_contain_windows)
 
-        
-        self._create_directory_structure(output_path)
-        self._create_site_info_file()
-        self._create_space_files(zones_contain_spaces)
-        self._create_hvac_files(hvacs_feed_hvacs, hvacs_feed_zones)
-        self._create_zone_files(zones_contain_spaces)
-        self._create_window_files(zones_contain_windows)
-        self._create_point_list()
-
         # Save configuration
         config = {
             "site_id": self.site_id,
@@ -240,11 +261,71 @@ class SurveyGenerator:
             "zones_contain_spaces": zones_contain_spaces,
             "zones_contain_windows": zones_contain_windows
         }
-        
+        if packed:
+            self._create_survey_container(output_path, hvacs_feed_hvacs, hvacs_feed_zones, zones_contain_spaces, zones_contain_windows, config)
+            return
+
+        self._create_directory_structure(output_path)
+        self._create_site_info_file()
+        self._create_space_files(zones_contain_spaces)
+        self._create_hvac_files(hvacs_feed_hvacs, hvacs_feed_zones)
+        self._create_zone_files(zones_contain_spaces)
+        self._create_window_files(zones_contain_windows)
+        self._create_point_list()
+
         with open(self.base_dir / "config.json", 'w') as f:
             json.dump(config, f, indent=4)
 
 
+    @classmethod
+    def generate_batch(cls, buildings, output_path, workers=None, packed=False, hvac_type="hp-rtu", system_of_units="IP"):
+        """Generate easy_config surveys for many buildings with a thread pool
+        
+        buildings: pandas.DataFrame or path to a CSV
+            One row per zone with site_id, building_id, space_count and window_count columns,
+            in the order zones are numbered. A zone_count column repeats the row for that many zones.
+            Optional hvac_type and system_of_units columns override the defaults per building.
+        output_path: str
+            Directory the surveys are written to, as for easy_config
+        workers: int
+            Number of buildings generated at once, defaults to the ThreadPoolExecutor default
+        packed: bool
+            Write survey container files instead of directory trees
+        
+        A building that fails (e.g. FileExistsError when its survey already exists, or a blank space_count)
+        doesn't stop the batch.
+        Returns a dataframe with site_id, building_id, path and error (None on success) for every building.
+        """
+        if not isinstance(buildings, pd.DataFrame):
+            buildings = pd.read_csv(buildings)
+
+        def generate(building):
+            # zone rows are parsed in the job too, so a building with bad counts only fails itself
+            (site_id, building_id), zones = building
+            site_id, building_id = str(site_id), str(building_id)
+            try:
+                if "zone_count" in zones.columns:
+                    zones = zones.reset_index(drop=True)
+                    zones = zones.loc[zones.index.repeat(zones["zone_count"].astype(int))]
+                # per building settings are read from the first zone row, blank cells use the defaults
+                settings = zones.iloc[0].dropna()
+                zone_space_window_list = list(zip(zones["space_count"].astype(int), zones["window_count"].astype(int)))
+                generator = cls(site_id, building_id, settings.get("hvac_type", hvac_type),
+                                settings.get("system_of_units", system_of_units))
+                generator.easy_config(zone_space_window_list, output_path, packed=packed)
+            except Exception as e:
+                return site_id, building_id, None, f"{type(e).__name__}: {e}"
+            return site_id, building_id, str(generator.base_dir), None
+
+        building_zones = buildings.groupby(["site_id", "building_id"], sort=False)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = pd.DataFrame(list(executor.map(generate, building_zones)), columns=["site_id", "building_id", "path", "error"])
+        failed = results[results["error"].notna()]
+        for _, failure in failed.iterrows():
+            print(f"Failed to generate survey for {failure['site_id']}/{failure['building_id']}: {failure['error']}")
+        print(f"Generated {len(results) - len(failed)} of {len(results)} surveys")
+        return results
+
     def _defaults(self):
         # TODO: Any default informatino to fill?
         pass   
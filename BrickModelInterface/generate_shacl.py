@@ -1,3 +1,6 @@
+import hashlib
+import json
+import os
 import yaml
 import rdflib
 from rdflib import Graph, Namespace, Literal, URIRef, BNode
@@ -5,22 +8,38 @@ from pyshacl import validate
 from .namespaces import *
 from pathlib import Path
 from importlib.resources import files
+from importlib.metadata import version, PackageNotFoundError
 from .utils import * 
 from buildingmotif.dataclasses import Library
 from rdflib import Namespace
 
 from buildingmotif import BuildingMOTIF, get_building_motif
 from buildingmotif.dataclasses import Library, Model
+from .brick_hierarchy import _cache_dir
+
+# Generated shapes depend on the templates, this package and buildingmotif, which inlines the template dependencies
+SHAPES_CACHE_PACKAGES = ['Semantic_MPC_Interface', 'buildingmotif']
+# Bump when the layout of the cached files changes. The source of the modules generating shapes is hashed too, since
+# editable installs keep the same package version while the code changes.
+SHAPES_CACHE_VERSION = 1
+SHAPES_CACHE_MODULES = ['generate_shacl.py', 'utils.py']
+
+def _package_version(package):
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return 'unknown'
 
 
 class SHACLHandler:
     """Class to handle SHACL shape generation and validation"""
     
-    def __init__(self, template_dir=None):
+    def __init__(self, template_dir=None, cache_dir=None):
         """Initialize SHACL handler
         May want option to pass in existing buildingmotif instance.
         Args:
             template_dir: Directory containing templates. If None, uses default s223 templates
+            cache_dir: Directory of generated shapes graphs, defaults to the shapes folder of the user's cache directory
         """
         # Not sure how to manage building motif
 
@@ -29,6 +48,7 @@ class SHACLHandler:
         self.template_dir = Path(template_dir)
         self.nodes_templates = self.template_dir.joinpath('nodes.yml')
         self.relations_templates = self.template_dir.joinpath('relations.yml')
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else _cache_dir() / 'shapes'
         self.shapes_graph = Graph()
         bind_prefixes(self.shapes_graph)
 
@@ -59,17 +79,64 @@ class SHACLHandler:
             if dependencies['args']['name'] == name:
                 return dependencies['template']
 
-    def generate_shapes(self):
+    def _templates_fingerprint(self):
+        """Hash of every template file in the template directory, and the versions and source of the code generating shapes"""
+        fingerprint = hashlib.sha256(f"cache={SHAPES_CACHE_VERSION}\n".encode('utf-8'))
+        for module in SHAPES_CACHE_MODULES:
+            fingerprint.update(module.encode('utf-8'))
+            fingerprint.update(files('BrickModelInterface').joinpath(module).read_bytes())
+        for package in SHAPES_CACHE_PACKAGES:
+            fingerprint.update(f"{package}={_package_version(package)}\n".encode('utf-8'))
+        for template_file in sorted(self.template_dir.glob('*.yml')):
+            fingerprint.update(template_file.name.encode('utf-8'))
+            fingerprint.update(template_file.read_bytes())
+        return fingerprint.hexdigest()
+
+    def generate_shapes(self, use_cache=True):
+        """Generate the shapes graph from the node and relation templates
+
+        Args:
+            use_cache: Load the shapes generated last time the templates and package versions were the same,
+                and save newly generated shapes for next time
+        """
+        if use_cache:
+            fingerprint = self._templates_fingerprint()
+            shapes_file = self.cache_dir / f"{fingerprint}.ttl"
+            names_file = self.cache_dir / f"{fingerprint}.json"
+            if shapes_file.is_file() and names_file.is_file():
+                with open(names_file, 'r') as f:
+                    names = json.load(f)
+                self.nodes_templates_names = names['nodes']
+                self.relations_templates_names = names['relations']
+                self.shapes_graph.parse(shapes_file, format='turtle')
+                return
+
+        # each template file is parsed once
         with open(self.nodes_templates, 'r') as f:
-            templates = yaml.safe_load(f)
-        self.nodes_templates_names = list(templates.keys())
+            nodes_templates = yaml.safe_load(f)
+        self.nodes_templates_names = list(nodes_templates.keys())
         
         with open(self.relations_templates, 'r') as f:
-            templates = yaml.safe_load(f)
-        self.relations_templates_names = list(templates.keys())
+            relations_templates = yaml.safe_load(f)
+        self.relations_templates_names = list(relations_templates.keys())
+
+        self._generate_shapes(templates=nodes_templates)
+        self._generate_relation_inference(templates=relations_templates)
+
+        if use_cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # written under temporary names and renamed, so a concurrent generation never reads a partial file
+            self.shapes_graph.serialize(f"{shapes_file}.tmp", format='turtle')
+            with open(f"{names_file}.tmp", 'w') as f:
+                json.dump({'nodes': self.nodes_templates_names, 'relations': self.relations_templates_names}, f)
+            os.replace(f"{shapes_file}.tmp", shapes_file)
+            os.replace(f"{names_file}.tmp", names_file)
 
-        self._generate_shapes(templates_file=self.nodes_templates)
-        self._generate_relation_inference(templates_file=self.relations_templates)
+    def _load_templates_file(self, templates_file, templates):
+        if templates is not None:
+            return templates
+        with open(templates_file, 'r') as f:
+            return yaml.safe_load(f)
     
     def _parse_template(self, template_data):
         if 'body' not in template_data:
@@ -78,9 +145,8 @@ class SHACLHandler:
         template_graph.parse(data=template_data['body'], format='turtle')
         return template_graph
     
-    def _generate_relation_inference(self, templates_file):
-        with open(templates_file, 'r') as f:
-            templates = yaml.safe_load(f)
+    def _generate_relation_inference(self, templates_file=None, templates=None):
+        templates = self._load_templates_file(templates_file or self.relations_templates, templates)
         # Kind of turning SHACL into OWL for 223
         for template_name in templates.keys():
             template = self.template_library.get_template_by_name(template_name)
@@ -113,18 +179,19 @@ class SHACLHandler:
             
             self.shapes_graph.add((HPFS[f'{template_name}AnnotationRule'], SH.construct, Literal(sparql_rule)))
         
-    def _generate_shapes(self, templates_file):
+    def _generate_shapes(self, templates_file=None, templates=None):
         """Convert templates to SHACL shapes
         
         Args:
             templates_file: Path to templates YAML file. If None, uses default s223 templates
+            templates: Already parsed templates, used instead of reading templates_file
         
         Returns:
             Graph: The generated SHACL shapes graph
         """            
-        # Parse YAML
-        with open(templates_file, 'r') as f:
-            templates = yaml.safe_load(f)
+        templates = self._load_templates_file(templates_file or self.nodes_templates, templates)
+        # Property shape names are minted for every triple in every template, so avoid probing the graph for each suffix
+        self.uri_allocator = UniqueURIAllocator(self.shapes_graph)
         # Kind of turning SHACL into OWL for 223
         for template_name, template_data in templates.items():
             template_graph = self._parse_template(template_data)
@@ -162,13 +229,13 @@ class SHACLHandler:
                         continue
                         # Constraint covered by mincount
 
-                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri,o])
+                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri,o], allocator=self.uri_allocator)
                 self.shapes_graph.add((shape_uri, SH.property, prop_shape))
                 self.shapes_graph.add((prop_shape, RDF.type, SH.PropertyShape))
                 self.shapes_graph.add((prop_shape, SH.path, p))
                 self.shapes_graph.add((prop_shape, SH.qualifiedMinCount, Literal(1)))
 
-                qual_val_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri,o])
+                qual_val_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri,o], allocator=self.uri_allocator)
                 self.shapes_graph.add((prop_shape, SH.qualifiedValueShape, qual_val_shape))
                 self.shapes_graph.add((qual_val_shape, RDF.type, SH.NodeShape))
                 
@@ -190,13 +257,13 @@ class SHACLHandler:
             
             # Not great implementation, but works for now 
             for p, count in prop_counts.items():
-                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri, p])
+                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri, p], allocator=self.uri_allocator)
                 self.shapes_graph.add((shape_uri, SH.property, prop_shape))
                 self.shapes_graph.add((prop_shape, SH.minCount, Literal(count)))
                 self.shapes_graph.add((prop_shape, SH.maxCount, Literal(count)))
                 self.shapes_graph.add((prop_shape, SH.path, p))
             if S223['hasAspect'] not in prop_counts.keys():
-                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri], '_noAspects')
+                prop_shape = create_uri_name_from_uris(self.shapes_graph, HPFS, [shape_uri], '_noAspects', allocator=self.uri_allocator)
                 self.shapes_graph.add((shape_uri, SH.property, prop_shape))
                 self.shapes_graph.add((prop_shape, SH.minCount, Literal(0)))
                 self.shapes_graph.add((prop_shape, SH.maxCount, Literal(0)))
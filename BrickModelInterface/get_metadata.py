@@ -3,6 +3,7 @@ import os
 from typing import Dict, Any, Union, List, Optional
 from .unit_conversion import convert_units
 from .namespaces import * 
+from .utils import rewrite_brick_inverse_query
 
 UNIT_CONVERSIONS = {
             UNIT["DEG_F"]: UNIT["DEG_C"],
@@ -261,7 +262,7 @@ sparql_queries = {
 
 class BuildingMetadataLoader:
     # Could do all alignment through templates by redefining mapping brick and s223 to hpf namespace, but this seems onerous
-    def __init__(self, source: Union[str, Graph], ontology: str):
+    def __init__(self, source: Union[str, Graph], ontology: str, virtual_inverse_relations: bool = False):
         if os.path.isfile(source):
             self.g = Graph()
             self.g.parse(source)
@@ -274,11 +275,19 @@ class BuildingMetadataLoader:
         self.HPF = Namespace("urn:hpflex#")
         self.site = self.g.value(None, RDF.type, BRICK.Site)
         self.ontology = ontology
+        # Set for models saved with virtual_inverse_relations, which only contain canonical relation directions
+        self.virtual_inverse_relations = virtual_inverse_relations
 
         # Only one query so far requires loading the ontology to use subClassOf in 223:
         if ontology == 's223':
             self.g.parse("https://open223.info/223p.ttl", format = 'ttl')
 
+    def _query(self, query):
+        """Run a SPARQL query, resolving inverse Brick relations if they are not materialized."""
+        if self.virtual_inverse_relations and self.ontology == 'brick':
+            query = rewrite_brick_inverse_query(query)
+        return self.g.query(query)
+
     def convert_model_to_si(self):
         """
         Convert all quantities in a Brick model to SI units
@@ -291,7 +300,7 @@ class BuildingMetadataLoader:
         """        
         query = sparql_queries["convert_to_si"][self.ontology]
         
-        for row_dict in self.g.query(query).bindings:
+        for row_dict in self._query(query).bindings:
             # will throw error if not all things are present
             subject, value, unit = row_dict['s'], row_dict['v'], row_dict['u']
             isDelta = row_dict.get('isDelta', False)
@@ -349,7 +358,7 @@ class BuildingMetadataLoader:
             "building_id": self._get_property_value(self.site, BRICK.buildingID),
         }
         else:
-            results = self.g.query(sparql_queries["site_info"][self.ontology])
+            results = self._query(sparql_queries["site_info"][self.ontology])
             return {str(k): v.toPython() for k, v in results.bindings[0].items()} 
 
     # May want to break this out into separate queries to make debugging a bit easier
@@ -391,7 +400,7 @@ class BuildingMetadataLoader:
             "temperature_unit": [],
         }
         
-        results = self.g.query(sparql_queries['get_tstats'][self.ontology])
+        results = self._query(sparql_queries['get_tstats'][self.ontology])
         
         tstats_zones = [(r['tstat'], r['zone']) for r in results]
         
@@ -409,7 +418,7 @@ class BuildingMetadataLoader:
         # brick:resolution/brick:value ?resolution .
             ## brick:resolution/brick:value ?resolution .
             # Query thermostat-specific data
-            results = self.g.query(sparql_queries['get_tstat_data'][self.ontology] % tstat)
+            results = self._query(sparql_queries['get_tstat_data'][self.ontology] % tstat)
 
             if len(results) != 1:
                 raise Exception(f"Expected 1 result for each variable, got {len(results)}")
@@ -425,7 +434,7 @@ class BuildingMetadataLoader:
             thermostat_data["resolution"].append(result["resolution"].toPython())
 
             # Query zone-specific data (HVAC capacity and COP)
-            zone_results = self.g.query(sparql_queries['get_unit_data'][self.ontology] % tstat)
+            zone_results = self._query(sparql_queries['get_unit_data'][self.ontology] % tstat)
 
             if len(zone_results) != 1:
                 raise Exception(f"Expected 1 result for each variable, got {len(zone_results)}")
@@ -433,7 +442,7 @@ class BuildingMetadataLoader:
             zone_result = zone_results.bindings[0]
             
             # Query floor area data (sum of all spaces in zone)
-            floor_area_results = self.g.query(sparql_queries['get_floor_area_data'][self.ontology] % tstat)
+            floor_area_results = self._query(sparql_queries['get_floor_area_data'][self.ontology] % tstat)
             
             if len(floor_area_results) != 1:
                 raise Exception(f"Expected 1 result for floor area, got {len(floor_area_results)}")
@@ -450,7 +459,7 @@ class BuildingMetadataLoader:
                 floor_area_unit = floor_area_unit.toPython().split("/")[-1]
             
             # Query window data (largest window by area)
-            window_results = self.g.query(sparql_queries['get_window_data'][self.ontology] % tstat)
+            window_results = self._query(sparql_queries['get_window_data'][self.ontology] % tstat)
             
             if len(window_results) != 1:
                 raise Exception(f"Expected 1 result for window data, got {len(window_results)}")
@@ -513,9 +522,9 @@ class BuildingMetadataLoader:
 
             ## TODO: Add setpoint type
             # # Determine setpoint type
-            # double_setpoint = self.g.query(sparql_queries["ask-dual-sp"][self.ontology] % tstat).askAnswer
+            # double_setpoint = self._query(sparql_queries["ask-dual-sp"][self.ontology] % tstat).askAnswer
 
-            # single_setpoint = self.g.query(sparql_queries['ask-single-sp'][self.ontology] % tstat).askAnswer
+            # single_setpoint = self._query(sparql_queries['ask-single-sp'][self.ontology] % tstat).askAnswer
 
             # if double_setpoint:
             #     thermostat_data["setpoint_type"].append("double")
@@ -525,7 +534,7 @@ class BuildingMetadataLoader:
             #     raise Exception(f"Setpoint configuration unrecognized for thermostat {tstat}")
 
             # Determine heating fuel type
-            electric_heat = self.g.query(sparql_queries['ask-electric-heat'][self.ontology] % tstat).askAnswer
+            electric_heat = self._query(sparql_queries['ask-electric-heat'][self.ontology] % tstat).askAnswer
 
             thermostat_data["fuel_heat_list"].append("electricity" if electric_heat else "gas")
             thermostat_data["fuel_cool_list"].append("electricity")
@@ -533,7 +542,7 @@ class BuildingMetadataLoader:
             thermostat_data['cool_availability'].append(True)
 
             # determining temperature unit 
-            unit_results = self.g.query(sparql_queries['get-tstat-units'][self.ontology] % tstat)
+            unit_results = self._query(sparql_queries['get-tstat-units'][self.ontology] % tstat)
             if len(unit_results) > 1:
                 raise Exception("Multiple unit results, expected 1 unit, got %d" % len(unit_results))
             tstat_unit = unit_results.bindings[0]['unit'].toPython().split('/')[-1]
@@ -0,0 +1,126 @@
+# Uploads many dashboards to Grafana, e.g. one per building of a portfolio
+# Requests share one pooled session with retries and a timeout, and dashboards that haven't changed since their
+# last successful upload are skipped using content hashes kept in a state file.
+import hashlib
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from grafanalib.core import Dashboard
+from grafanalib._gen import DashboardEncoder
+
+# statuses Grafana returns when it is overloaded or restarting
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def dashboard_key(dashboard: Dashboard) -> str:
+    # Grafana identifies dashboards by uid, or by title in the general folder when there is none
+    return dashboard.uid or dashboard.title
+
+def dashboard_hash(dashboard: Dashboard) -> str:
+    """Hash of the dashboard content, independent of key order"""
+    data = json.dumps(dashboard.to_json_data(), sort_keys=True, cls=DashboardEncoder)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+class DashboardUploader:
+    """
+    Batch uploader of dashboards to the Grafana HTTP API
+
+    Args:
+        grafana_server: URL of the Grafana server, ending with /
+        grafana_api_key: API key with permission to write dashboards
+        workers: Maximum number of concurrent uploads, also the size of the connection pool
+        retries: Retries of failed connections and of responses with a status in RETRY_STATUSES
+        backoff: Backoff factor in seconds, retry n waits backoff * 2 ** (n - 1)
+        timeout: Seconds to wait for Grafana to connect and respond
+        state_file: JSON file keeping the hash of each uploaded dashboard, so unchanged dashboards are
+            skipped by later runs. Without it, hashes are only kept by this uploader.
+        verify: Whether to verify SSL certificates
+    """
+    def __init__(self, grafana_server: str, grafana_api_key: str, workers = 4, retries = 3, backoff = 0.5,
+                 timeout = 10, state_file = None, verify = True):
+        self.grafana_server = grafana_server
+        self.timeout = timeout
+        self.workers = workers
+        self.state_file = state_file
+        self.verify = verify
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f"Bearer {grafana_api_key}",
+                                     'Content-Type': 'application/json'})
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset(['POST']), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.hashes = {}
+        if state_file is not None and os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                self.hashes = json.load(f)
+
+    def _save_state(self):
+        if self.state_file is not None:
+            with open(self.state_file, 'w') as f:
+                json.dump(self.hashes, f, indent=2, sort_keys=True)
+
+    def _upload(self, dashboard: Dashboard, content_hash, overwrite, message):
+        data = json.dumps({
+            "dashboard": dashboard.to_json_data(),
+            "overwrite": overwrite,
+            "message": message,
+        }, sort_keys=True, cls=DashboardEncoder)
+        r = self.session.post(f"{self.grafana_server}api/dashboards/db", data=data,
+                              timeout=self.timeout, verify=self.verify)
+        r.raise_for_status()
+        self.hashes[dashboard_key(dashboard)] = content_hash
+        return r.status_code
+
+    def upload(self, dashboards: Iterable[Dashboard], overwrite: bool = True,
+               message: str = "Updated by BrickToGrafana", force: bool = False) -> pd.DataFrame:
+        """
+        Upload dashboards concurrently, skipping the ones unchanged since their last upload
+
+        Args:
+            dashboards: Dashboards to upload
+            overwrite: Whether to overwrite existing dashboards
+            message: Commit message for the dashboards
+            force: Upload dashboards even if they haven't changed
+
+        Raises:
+            ValueError: If several dashboards have the same uid, or title without uid. Nothing is uploaded then.
+
+        Returns:
+            Dataframe with the dashboard, status ('uploaded', 'unchanged' or 'failed'), status code and error
+        """
+        dashboards = list(dashboards)
+        keys = [dashboard_key(dashboard) for dashboard in dashboards]
+        duplicates = sorted(key for key, count in Counter(keys).items() if count > 1)
+        if duplicates:
+            raise ValueError(f"Dashboards with the same uid or title would overwrite each other: {duplicates}")
+        results = []
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for key, dashboard in zip(keys, dashboards):
+                content_hash = dashboard_hash(dashboard)
+                if not force and self.hashes.get(key) == content_hash:
+                    results.append((key, 'unchanged', None, None))
+                    continue
+                futures[key] = executor.submit(self._upload, dashboard, content_hash, overwrite, message)
+            for key, future in futures.items():
+                try:
+                    results.append((key, 'uploaded', future.result(), None))
+                except requests.RequestException as e:
+                    status_code = e.response.status_code if e.response is not None else None
+                    print(f"Failed to upload {key}: {e}")
+                    results.append((key, 'failed', status_code, str(e)))
+        self._save_state()
+        results = pd.DataFrame(results, columns=['dashboard', 'status', 'status_code', 'error'])
+        counts = results['status'].value_counts()
+        print(f"Uploaded {counts.get('uploaded', 0)} of {len(results)} dashboards, {counts.get('unchanged', 0)} unchanged")
+        return results
+
+    def close(self):
+        self.session.close()
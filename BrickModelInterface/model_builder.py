@@ -4,13 +4,22 @@ from buildingmotif import BuildingMOTIF
 from buildingmotif.dataclasses import Library, Model
 from importlib.resources import files
 import typing
-from .utils import add_brick_inverse_relations
+from .utils import add_brick_inverse_relations, canonicalize_brick_relations, serialize_graph
 import os
 
 #TODO: if this is actually going to be a separate packge should change this behavior
 brick_template_dir = str(files('BrickModelInterface').joinpath('brick-templates'))
 s223_template_dir = str(files('BrickModelInterface').joinpath('s223-templates'))
 
+# BuildingMOTIF is a singleton, so libraries loaded into it are shared by every builder in the process.
+# Reloading a library from its directory into the same session fails after a couple of builders, so load each once.
+_template_libraries = {}
+
+def _load_templates(template_dir):
+    if template_dir not in _template_libraries:
+        _template_libraries[template_dir] = Library.load(directory=template_dir)
+    return _template_libraries[template_dir]
+
 #TODO: make base class and create Brick and 223P versions 
 class BrickModelBuilder:
     def __init__(self, 
@@ -44,11 +53,11 @@ class BrickModelBuilder:
         # TODO: Download ontologies and get rid of hard coding
         if ontology == 'brick':
             # Load both nodes and relations templates for Brick
-            self.templates = Library.load(directory=brick_template_dir)
+            self.templates = _load_templates(brick_template_dir)
             self.ontology_ns = BRICK
         elif ontology == 's223':
             # Load both nodes and relations templates for S223
-            self.templates = Library.load(directory=s223_template_dir)
+            self.templates = _load_templates(s223_template_dir)
             self.ontology_ns = S223
         else:
             raise ValueError("Invalid ontology. Must be 'Brick' or 's223'")
@@ -238,7 +247,16 @@ class BrickModelBuilder:
             "target": point_dict['name']
         })
         
-    def save_model(self, filename, add_inverse_relations = True):
-        if add_inverse_relations:
+    def save_model(self, filename, add_inverse_relations = True, virtual_inverse_relations = False, format = 'turtle', compression = None):
+        # virtual_inverse_relations writes every relationship once, in its canonical direction (e.g. brick:feeds, not brick:isFedBy).
+        # Readers then need virtual_inverse_relations = True to resolve the inverse predicates. Takes precedence over add_inverse_relations.
+        # The canonical graph is a copy, so the model keeps its inverse relations for further building and queries.
+        graph = self.model.graph
+        if virtual_inverse_relations:
+            graph = canonicalize_brick_relations(self.model.graph)
+        elif add_inverse_relations:
             self.model.graph = add_brick_inverse_relations(self.model.graph)
-        self.model.graph.serialize(filename, format="turtle")
\ No newline at end of file
+            graph = self.model.graph
+        # 'nt' and 'nquads' are streamed to the file, which is much faster and lighter than turtle for large models.
+        # compression can be None, 'gzip' or 'zstd' (requires zstandard)
+        serialize_graph(graph, filename, format=format, compression=compression)
\ No newline at end of file
@@ -2,46 +2,101 @@
 # currently a placeholder that works for current method
 # Can try some methods to generate the following csv file.
 import pandas as pd
-from .namespaces import * 
-from rdflib import Literal
+from itertools import chain
+from .namespaces import *
+from rdflib import Literal, URIRef
 
-def add_points(builder, mapping_file, ontology = 'brick'):
-    # ontology can be brick or 223p
-    mapping_df = pd.read_csv(mapping_file)
-    for _, row in mapping_df.iterrows():
-       
-        zone_id = row['zone_id']
-        point_uri = builder.building_ns[f"{row['topic_name'].replace('/', '_')}"]
-        # print(point_uri)
-        unit_classes = {
-                    'F':(UNIT.DEG_F,QK.Temperature),
-                    "%":(UNIT.PERCENT, QK.DimensionlessRatio),
-                    "BTU_TH-PER-LB":(UNIT["BTU_TH-PER-LB"], QK.SpecificEnergy),
-                }
-        if row['unit_type'] in unit_classes:
-            builder.model.graph.add((point_uri, QUDT.hasUnit, unit_classes[row['unit_type']][0]))
-            builder.model.graph.add((point_uri, QUDT.hasQuantityKind, unit_classes[row['unit_type']][1]))
-        
-        if ontology == 'brick':
-            point_type = BRICK[row['point type'].replace(" ", "_")]
-            # adding point to zone vs equipment
-            if 'domainSpace' in row['equipment']:
-                builder.model.graph.add((builder.building_ns[zone_id], BRICK.hasPoint, point_uri))
-            else:
-                # relies on zones and hvac units being mapped consistently in variable-map and metadata 
-                hvac_unit = builder.model.graph.value(builder.building_ns[str(zone_id)], BRICK.isFedBy, any = False)
-                # print('hvac unit: ',hvac_unit)
-                # print('zone id: ', zone_id)
-
-                builder.model.graph.add((hvac_unit, BRICK.hasPoint, point_uri))
+UNIT_CLASSES = {
+    'F':(UNIT.DEG_F,QK.Temperature),
+    "%":(UNIT.PERCENT, QK.DimensionlessRatio),
+    "BTU_TH-PER-LB":(UNIT["BTU_TH-PER-LB"], QK.SpecificEnergy),
+}
+
+# Only these columns of the mapping file are used
+POINT_COLUMNS = ['topic_name', 'zone_id', 'unit_type', 'point type', 'equipment']
+
+def _to_uris(namespace, names):
+    return (str(namespace) + names.astype(str)).map(URIRef)
+
+def get_zone_feeds_index(graph):
+    """Map each zone to the equipment feeding it, from both brick:feeds and brick:isFedBy"""
+    feeds_index = {}
+    for hvac, zone in graph.subject_objects(BRICK.feeds):
+        feeds_index.setdefault(zone, set()).add(hvac)
+    for zone, hvac in graph.subject_objects(BRICK.isFedBy):
+        feeds_index.setdefault(zone, set()).add(hvac)
+    return feeds_index
+
+def _resolve_hvac_units(zone_uris, feeds_index, hvac_units):
+    # hvac_units is shared across chunks so each zone is resolved and reported once
+    for zone_uri in zone_uris.unique():
+        if zone_uri in hvac_units:
+            continue
+        feeders = feeds_index.get(zone_uri, set())
+        if len(feeders) == 1:
+            hvac_units[zone_uri] = next(iter(feeders))
+            continue
+        if len(feeders) == 0:
+            print(f"Skipping equipment points for zone {zone_uri}: no equipment feeds the zone")
         else:
-            point_type = S223[row['point type'].replace(" ", "_")]
-            # adding point to zone vs equipment
-            builder.model.graph.add((builder.building_ns[zone_id], S223.hasPoint, point_uri))
-            
+            print(f"Skipping equipment points for zone {zone_uri}: fed by multiple equipment {sorted(feeders)}")
+        hvac_units[zone_uri] = None
 
-        builder.model.graph.add((point_uri, A, point_type))
+def _add_points_frame(builder, mapping_df, ontology, feeds_index, hvac_units):
+    graph = builder.model.graph
+    zone_uris = _to_uris(builder.building_ns, mapping_df['zone_id'])
 
-        # Adding external reference to volttron topic 
-        builder.model.graph.add((point_uri, REF.hasExternalReference, point_uri + '_external_reference'))
-        builder.model.graph.add((point_uri + '_external_reference', REF.hasTopic, Literal(row['topic_name'])))
+    if ontology == 'brick':
+        ontology_ns = BRICK
+        # adding point to zone vs equipment
+        on_zone = mapping_df['equipment'].str.contains('domainSpace', regex=False, na=False)
+        # relies on zones and hvac units being mapped consistently in variable-map and metadata
+        _resolve_hvac_units(zone_uris[~on_zone], feeds_index, hvac_units)
+        point_of_uris = zone_uris.where(on_zone, zone_uris.map(hvac_units))
+        # points of zones without a single feeder are reported above and not added
+        attached = point_of_uris.notna()
+        mapping_df, point_of_uris = mapping_df[attached], point_of_uris[attached]
+    else:
+        ontology_ns = S223
+        # adding point to zone vs equipment
+        point_of_uris = zone_uris
+
+    point_uris = _to_uris(builder.building_ns, mapping_df['topic_name'].astype(str).str.replace('/', '_', regex=False))
+    ref_uris = point_uris.map(lambda point_uri: point_uri + '_external_reference')
+    topic_literals = mapping_df['topic_name'].map(lambda topic: Literal(topic))
+    type_uris = _to_uris(ontology_ns, mapping_df['point type'].str.replace(" ", "_", regex=False))
+
+    has_unit = mapping_df['unit_type'].isin(UNIT_CLASSES.keys())
+    units = mapping_df.loc[has_unit, 'unit_type']
+    point_count = len(mapping_df)
+    triples = chain(
+        zip(point_uris[has_unit], [QUDT.hasUnit] * len(units), units.map(lambda unit: UNIT_CLASSES[unit][0])),
+        zip(point_uris[has_unit], [QUDT.hasQuantityKind] * len(units), units.map(lambda unit: UNIT_CLASSES[unit][1])),
+        zip(point_of_uris, [ontology_ns.hasPoint] * point_count, point_uris),
+        zip(point_uris, [A] * point_count, type_uris),
+        # Adding external reference to volttron topic
+        zip(point_uris, [REF.hasExternalReference] * point_count, ref_uris),
+        zip(ref_uris, [REF.hasTopic] * point_count, topic_literals),
+    )
+    graph.addN((s, p, o, graph) for s, p, o in triples)
+    return point_count
+
+def add_points(builder, mapping_file, ontology = 'brick', chunksize = None):
+    # ontology can be brick or 223p
+    # Works on whole columns and adds all triples in one addN, since point lists can have tens of thousands of topics
+    # chunksize streams the file in chunks of that many rows so memory stays bounded, reporting progress after each chunk
+    read_csv_kwargs = {'usecols': lambda column: column in POINT_COLUMNS}
+    if chunksize is None:
+        chunks = [pd.read_csv(mapping_file, **read_csv_kwargs)]
+    else:
+        chunks = pd.read_csv(mapping_file, chunksize=chunksize, **read_csv_kwargs)
+    feeds_index = get_zone_feeds_index(builder.model.graph) if ontology == 'brick' else None
+    hvac_units = {}
+    rows_read = 0
+    points_added = 0
+    for mapping_df in chunks:
+        rows_read += len(mapping_df)
+        points_added += _add_points_frame(builder, mapping_df, ontology, feeds_index, hvac_units)
+        if chunksize is not None:
+            print(f"Read {rows_read} rows, added {points_added} points")
+    return points_added
@@ -0,0 +1,153 @@
+# Reverse lookup from VOLTTRON topics to the points of a model, for ingesting data without querying the graph per message
+# The index is built once by walking the graph: point -> external reference -> topic, plus the point's class, unit and zone.
+import sqlite3
+import sys
+from collections import namedtuple
+from typing import Optional, Union
+from rdflib import Graph
+from .namespaces import *
+from .parse_points import get_zone_feeds_index
+
+PointRecord = namedtuple('PointRecord', ['point', 'point_class', 'unit', 'zone'])
+
+# ref:hasTopic is added by add_points, ref:hasTopicName by the volttron-external-reference template
+TOPIC_PREDICATES = [REF.hasTopic, REF.hasTopicName]
+ZONE_CLASSES = [BRICK.HVAC_Zone, S223.Zone]
+
+def _load_graph(source):
+    if isinstance(source, Graph):
+        return source
+    g = Graph()
+    g.parse(source)
+    return g
+
+def _point_class(g, point):
+    # points are typed with one Brick or 223 class
+    for point_class in g.objects(point, A):
+        if point_class.startswith(BRICK) or point_class.startswith(S223):
+            return point_class
+    return g.value(point, A)
+
+def iter_point_records(g):
+    """Yield (topic, PointRecord) for every point with an external reference topic in the graph"""
+    zones = {zone for zone_class in ZONE_CLASSES for zone in g.subjects(A, zone_class)}
+    point_of = {}
+    for predicate in [BRICK.hasPoint, S223.hasPoint]:
+        for owner, point in g.subject_objects(predicate):
+            point_of.setdefault(point, owner)
+    for point, owner in g.subject_objects(BRICK.isPointOf):
+        point_of.setdefault(point, owner)
+    # equipment points belong to the zone the equipment feeds, when it feeds only one
+    feeds_index = get_zone_feeds_index(g)
+    zone_of_equipment = {}
+    for zone, feeders in feeds_index.items():
+        if zone in zones:
+            for feeder in feeders:
+                zone_of_equipment.setdefault(feeder, set()).add(zone)
+
+    # classes, units and zones repeat across points so the strings are interned
+    for point, ref in g.subject_objects(REF.hasExternalReference):
+        for topic_predicate in TOPIC_PREDICATES:
+            for topic in g.objects(ref, topic_predicate):
+                owner = point_of.get(point)
+                if owner in zones:
+                    zone = owner
+                else:
+                    fed_zones = zone_of_equipment.get(owner, ())
+                    zone = next(iter(fed_zones)) if len(fed_zones) == 1 else None
+                point_class = _point_class(g, point)
+                unit = g.value(point, QUDT.hasUnit)
+                yield str(topic), PointRecord(
+                    str(point),
+                    sys.intern(str(point_class)) if point_class is not None else None,
+                    sys.intern(str(unit)) if unit is not None else None,
+                    sys.intern(str(zone)) if zone is not None else None,
+                )
+
+class PointIndex:
+    """
+    In memory topic -> PointRecord(point, point_class, unit, zone) index of a model
+
+    Args:
+        source: Model graph or path to a model file
+    """
+    def __init__(self, source: Optional[Union[str, Graph]] = None):
+        self.records = {}
+        if source is not None:
+            self.refresh(source)
+
+    def refresh(self, source: Union[str, Graph]):
+        """Rebuild the index from a graph or model file, replacing all entries"""
+        self.records = dict(iter_point_records(_load_graph(source)))
+        return self
+
+    def get(self, topic, default=None) -> Optional[PointRecord]:
+        return self.records.get(topic, default)
+
+    def __getitem__(self, topic) -> PointRecord:
+        return self.records[topic]
+
+    def __contains__(self, topic):
+        return topic in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def to_sqlite(self, path):
+        """Write the index to a SQLite file that SQLitePointIndex can open without the model"""
+        return SQLitePointIndex(path).refresh_from_records(self.records.items())
+
+class SQLitePointIndex:
+    """
+    Topic -> PointRecord index stored in a SQLite file, for portfolios too large to keep in memory.
+    Lookups go through the primary key of the topic column.
+
+    Args:
+        path: SQLite file, created if it doesn't exist
+        source: Model graph or path to a model file to build the index from
+    """
+    def __init__(self, path, source: Optional[Union[str, Graph]] = None):
+        self.path = path
+        # read only use from ingest threads is fine, writes only happen in refresh
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "topic TEXT PRIMARY KEY, point TEXT NOT NULL, point_class TEXT, unit TEXT, zone TEXT) WITHOUT ROWID"
+        )
+        if source is not None:
+            self.refresh(source)
+
+    def refresh(self, source: Union[str, Graph]):
+        """Rebuild the index from a graph or model file, replacing all entries"""
+        return self.refresh_from_records(iter_point_records(_load_graph(source)))
+
+    def refresh_from_records(self, records):
+        # one transaction, so readers see either the old or the new index
+        with self.connection:
+            self.connection.execute("DELETE FROM points")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)",
+                ((topic, *record) for topic, record in records),
+            )
+        return self
+
+    def get(self, topic, default=None) -> Optional[PointRecord]:
+        row = self.connection.execute(
+            "SELECT point, point_class, unit, zone FROM points WHERE topic = ?", (topic,)
+        ).fetchone()
+        return default if row is None else PointRecord(*row)
+
+    def __getitem__(self, topic) -> PointRecord:
+        record = self.get(topic)
+        if record is None:
+            raise KeyError(topic)
+        return record
+
+    def __contains__(self, topic):
+        return self.get(topic) is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -1,128 +1,340 @@
-import csv
+import base64
+import hashlib
 import json
+import pandas as pd
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Iterator, Union, Optional
+from collections import deque
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
 from .model_builder import BrickModelBuilder
+from rdflib import Graph
+from .utils import get_brick_inverse_relations
+from .survey_container import SURVEY_TABLE_FILES, read_survey_container
+
+def _build_zone_shard(args) -> list:
+    """Build each zone of a shard on its own in a worker process, returned as (zone_id, N-Triples) pairs"""
+    survey_directory, ontology, zones = args
+    reader = SurveyReader(survey_directory, ontology = ontology)
+    return [(zone['zone_id'], _serialize_triples(reader._zone_triples(zone))) for zone in zones]
+
+def _serialize_triples(triples) -> str:
+    g = Graph()
+    g += triples
+    return g.serialize(format='nt', encoding='utf-8').decode('utf-8')
+
+def _parse_triples(data: str) -> set:
+    return set(Graph().parse(data=data, format='nt'))
+
+def _with_inverses(triples: set) -> set:
+    # saved models have the inverse relations added, so they are removed along with the triples
+    g = Graph()
+    g += triples
+    return triples | get_brick_inverse_relations(g)
+
+def _triple_digests(triples: set) -> set:
+    """8 byte digests of the triples and their inverse relations, enough to find them again in the saved model"""
+    return {_triple_digest(triple) for triple in _with_inverses(triples)}
+
+def _triple_digest(triple) -> bytes:
+    return hashlib.sha256(" ".join(term.n3() for term in triple).encode('utf-8')).digest()[:8]
+
+def _pack_digests(digests: set) -> str:
+    return base64.b64encode(b"".join(sorted(digests))).decode('ascii')
+
+def _unpack_digests(data: str) -> set:
+    packed = base64.b64decode(data)
+    return {packed[i:i + 8] for i in range(0, len(packed), 8)}
+
+MANIFEST_VERSION = 3
+
+def _hash_bytes(*parts: bytes) -> str:
+    return hashlib.sha256(b"\0".join(parts)).hexdigest()
+
+# Values treated as empty, compared after stripping whitespace and lowercasing
+EMPTY_VALUES = ['', 'nan', 'none', 'null', 'na', 'n/a']
+# Fields allowed to be empty in otherwise filled out rows
+SKIP_EMPTY_FIELDS = ['NOAAstation', 'noaa_station']
 
 class SurveyReader:
     def __init__(self, survey_directory: str, ontology = 'brick'):
+        # survey_directory can also be a packed survey container file (see survey_container), which is read at once
         self.base_dir = Path(survey_directory)
-        self.config = self._load_config()
-        self.site_info = self._load_site_info()
+        self.container_tables = None
+        self._container_mtime = None
+        self._load_container()
         self.ontology = ontology
+        # (table, zone) of the tables validated in full, so streaming them again doesn't revalidate
+        self._validated_tables = set()
+
+    def _load_container(self):
+        # containers are read at once, and read again only when the file changed
+        if self.base_dir.is_file() and self.base_dir.stat().st_mtime_ns != self._container_mtime:
+            self._container_mtime = self.base_dir.stat().st_mtime_ns
+            self.container_config, self.container_tables = read_survey_container(self.base_dir)
+            # rows of the per zone tables grouped by zone, so loading a zone doesn't scan the table
+            self.container_zone_tables = {
+                table: dict(iter(self.container_tables[table].groupby('zone_id', sort=False)))
+                for table in ['spaces', 'windows'] if table in self.container_tables
+            }
+
+    # config and site info are loaded the first time they're used
+    @cached_property
+    def config(self) -> Dict[str, Any]:
+        return self._load_config()
+
+    @cached_property
+    def site_info(self) -> Dict[str, str]:
+        return self._load_site_info()
         
+    def _clear_caches(self):
+        """Forget the config, site info and validated tables, so files edited since they were read are read again"""
+        self._load_container()
+        for attribute in ['config', 'site_info', '_scratch_builder', '_scratch_base']:
+            self.__dict__.pop(attribute, None)
+        self._validated_tables.clear()
+
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from config.json"""
+        if self.container_tables is not None:
+            return self.container_config
         with open(self.base_dir / "config.json", 'r') as f:
             return json.load(f)
 
-    def _validate_csv_row(self, row: Dict[str, str], context: str) -> bool:
+    def _load_table(self, table: str, zone_id: Optional[str] = None) -> pd.DataFrame:
+        """Load a survey table (the rows of one zone for spaces and windows) as strings"""
+        if self.container_tables is not None:
+            if zone_id is None:
+                return self.container_tables[table]
+            # numbered from 0 like the zone's own file
+            empty = self.container_tables[table].iloc[0:0]
+            return self.container_zone_tables[table].get(zone_id, empty).reset_index(drop=True)
+        try:
+            # Values are kept as strings, missing trailing fields are read as NaN
+            return pd.read_csv(self.base_dir / SURVEY_TABLE_FILES[table].format(zone=zone_id), dtype=str, keep_default_na=False, index_col=False)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+
+    def _iter_table_chunks(self, table: str, chunksize: int, zone_id: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Load a survey table chunksize rows at a time, chunks keep the row numbers of the whole table"""
+        if self.container_tables is not None:
+            df = self._load_table(table, zone_id)
+            for start in range(0, len(df), chunksize):
+                yield df.iloc[start:start + chunksize]
+            return
+        try:
+            with pd.read_csv(self.base_dir / SURVEY_TABLE_FILES[table].format(zone=zone_id), dtype=str, keep_default_na=False, index_col=False, chunksize=chunksize) as chunks:
+                yield from chunks
+        except pd.errors.EmptyDataError:
+            return
+
+    def _table_bytes(self, table: str, zone_id: Optional[str] = None) -> bytes:
+        """Raw contents of a survey table, used for the incremental build manifest"""
+        if self.container_tables is not None:
+            return self._load_table(table, zone_id).to_csv(index=False).encode('utf-8')
+        return (self.base_dir / SURVEY_TABLE_FILES[table].format(zone=zone_id)).read_bytes()
+
+    def _read_csv(self, table: str, context: str, zone_id: Optional[str] = None) -> list:
         """
-        Validate a CSV row for empty values.
+        Read a survey table and validate it for empty values.
         
         Args:
-            row: Dictionary representing a CSV row
+            table: Survey table, e.g. "zones" for zones/zones.csv
+            context: Context string for error messages (e.g., "Zone", "HVAC")
+            zone_id: Zone to read the spaces or windows of
+        """
+        return self._validate_rows(self._load_table(table, zone_id), context)
+
+    def _empty_row_errors(self, df: pd.DataFrame):
+        """Mask of the completely empty rows and one error per row with partial empty values"""
+        # Empty string, whitespace-only string, or common empty representations
+        empty = pd.DataFrame({
+            field: df[field].isna() | df[field].str.strip().str.lower().isin(EMPTY_VALUES)
+            for field in df.columns
+        }, index=df.index)
+        # Completely empty rows are skipped
+        skipped = empty.all(axis=1)
+        partial = empty.loc[~skipped, [field for field in df.columns if field not in SKIP_EMPTY_FIELDS]]
+        offending = partial[partial.any(axis=1)]
+        # row numbers count the header as row 1 to match the file in a spreadsheet
+        errors = [
+            f"row {index + 2}: {', '.join(offending.columns[empty_fields])}"
+            for index, empty_fields in zip(offending.index, offending.to_numpy())
+        ]
+        return skipped, errors
+
+    def _validate_rows(self, df: pd.DataFrame, context: str) -> list:
+        """
+        Validate the rows of a survey table for empty values, one column at a time.
+        
+        Args:
+            df: Rows of the table as strings
             context: Context string for error messages (e.g., "Zone", "HVAC")
             
         Returns:
-            bool: True if row is valid, False if row should be skipped
+            list: Rows as dictionaries, with completely empty rows skipped
             
         Raises:
-            ValueError: If row has partial empty values
+            ValueError: Listing every row with partial empty values and its empty fields
         """
-        def is_empty_value(value):
-            """Check if a value is considered empty"""
-            if value is None:
-                return True
-            if isinstance(value, str):
-                # Check for empty string, whitespace-only string, or common empty representations
-                stripped = value.strip()
-                return (stripped == '' or 
-                       stripped.lower() in ['nan', 'none', 'null', 'na', 'n/a', ''] or
-                       stripped == '')
-            # Handle other types that might be empty (e.g., from pandas)
-            try:
-                import numpy as np
-                if isinstance(value, (float, int)) and np.isnan(value):
-                    return True
-            except (ImportError, TypeError):
-                pass
-            try:
-                import pandas as pd
-                if pd.isna(value):
-                    return True
-            except (ImportError, AttributeError):
-                pass
-            return False
-        
-        # Check if row is completely empty
-        if all(is_empty_value(value) for value in row.values()):
-            return False
-        
-        # Check for any empty values
-        skip_fields = ['NOAAstation','noaa_station']
-        empty_fields = [field for field, value in row.items() if is_empty_value(value) and field not in skip_fields]
-        if empty_fields:
-            raise ValueError(f"{context} row has empty values for fields: {', '.join(empty_fields)}")
-        
-        return True
+        skipped, errors = self._empty_row_errors(df)
+        if errors:
+            raise ValueError(f"{context} rows have empty values for fields:\n" + "\n".join(errors))
+        return df[~skipped].to_dict('records')
+
+    def _validate_table(self, table: str, context: str, zone_id: Optional[str] = None, chunksize: int = 1000):
+        """
+        Validate a whole survey table chunksize rows at a time, before any of its rows are used
+
+        Raises:
+            ValueError: Listing every row of the table with partial empty values, as _validate_rows does
+        """
+        if (table, zone_id) in self._validated_tables:
+            return
+        errors = []
+        for chunk in self._iter_table_chunks(table, chunksize, zone_id):
+            errors += self._empty_row_errors(chunk)[1]
+        if errors:
+            raise ValueError(f"{context} rows have empty values for fields:\n" + "\n".join(errors))
+        self._validated_tables.add((table, zone_id))
+
+    def _iter_rows(self, table: str, context: str, zone_id: Optional[str] = None, chunksize: int = 1000) -> Iterator[Dict[str, str]]:
+        """Yield the rows of a survey table chunksize rows at a time, after validating the whole table"""
+        self._validate_table(table, context, zone_id, chunksize)
+        for chunk in self._iter_table_chunks(table, chunksize, zone_id):
+            yield from self._validate_rows(chunk, context)
 
     def _load_site_info(self) -> Dict[str, str]:
         """Load site information from site_info.csv"""
-        with open(self.base_dir / "site_info.csv", 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if self._validate_csv_row(row, "Site info"):
-                    return row
+        rows = self._read_csv("site_info", "Site info")
+        if rows:
+            return rows[0]
         raise ValueError("No valid site info found")
 
     def _load_zones(self) -> list:
         """Load zone information from zones.csv"""
-        zones = []
-        with open(self.base_dir / "zones" / "zones.csv", 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if self._validate_csv_row(row, "Zone"):
-                    zones.append(row)
-        return zones
+        return list(self.iter_zones())
 
     def _load_spaces(self, zone_id: str) -> list:
         """Load space information for a specific zone"""
-        spaces = []
-        with open(self.base_dir / "spaces" / f"{zone_id}_spaces.csv", 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if self._validate_csv_row(row, f"Space for zone {zone_id}"):
-                    spaces.append(row)
-        return spaces
+        return self._read_csv("spaces", f"Space for zone {zone_id}", zone_id)
 
     def _load_hvac(self) -> list:
         """Load HVAC information from hvac_units.csv"""
-        hvac_units = []
-        with open(self.base_dir / "hvac" / "hvac_units.csv", 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if self._validate_csv_row(row, "HVAC"):
-                    hvac_units.append(row)
-        return hvac_units
+        return list(self.iter_hvac())
 
     def _load_windows(self, zone_id) -> list:
         """Load window information from windows.csv"""
-        windows = []
-        with open(self.base_dir / "windows" / f"{zone_id}_windows.csv", 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if self._validate_csv_row(row, f"Window for zone {zone_id}"):
-                    windows.append(row)
-        return windows
-
-    def create_model(self, output_file: Union[str, None] = None):
-        """Generate the Brick model from the survey data"""
-        # Initialize the model builder with site information
-        builder = BrickModelBuilder(
-            site_id=self.site_info['site_id'],
-            ontology = self.ontology
+        return self._read_csv("windows", f"Window for zone {zone_id}", zone_id)
+
+    def iter_zones(self, chunksize: int = 1000) -> Iterator[Dict[str, str]]:
+        """Yield zone rows as zones.csv is read, chunksize rows at a time. The whole file is validated before the first row."""
+        return self._iter_rows("zones", "Zone", chunksize=chunksize)
+
+    def iter_spaces(self, zone_id: str, chunksize: int = 1000) -> Iterator[Dict[str, str]]:
+        """Yield the space rows of a zone as its spaces file is read, chunksize rows at a time"""
+        return self._iter_rows("spaces", f"Space for zone {zone_id}", zone_id, chunksize)
+
+    def iter_windows(self, zone_id: str, chunksize: int = 1000) -> Iterator[Dict[str, str]]:
+        """Yield the window rows of a zone as its windows file is read, chunksize rows at a time"""
+        return self._iter_rows("windows", f"Window for zone {zone_id}", zone_id, chunksize)
+
+    def iter_hvac(self, chunksize: int = 1000) -> Iterator[Dict[str, str]]:
+        """Yield HVAC rows as hvac_units.csv is read, chunksize rows at a time. The whole file is validated before the first row."""
+        return self._iter_rows("hvac_units", "HVAC", chunksize=chunksize)
+
+    def iter_zone_contents(self, read_ahead: int = 2) -> Iterator[tuple]:
+        """
+        Yield (zone, spaces, windows) for each zone, in zones.csv order.
+
+        Args:
+            read_ahead: Number of zones whose spaces and windows are read ahead in a thread pool
+                while the caller handles the current zone. At most read_ahead + 1 zones are held in memory.
+        """
+        if read_ahead < 1:
+            for zone in self.iter_zones():
+                yield zone, self._load_spaces(zone['zone_id']), self._load_windows(zone['zone_id'])
+            return
+        with ThreadPoolExecutor(max_workers=read_ahead) as executor:
+            pending = deque()
+            for zone in self.iter_zones():
+                pending.append((
+                    zone,
+                    executor.submit(self._load_spaces, zone['zone_id']),
+                    executor.submit(self._load_windows, zone['zone_id']),
+                ))
+                if len(pending) > read_ahead:
+                    zone, spaces, windows = pending.popleft()
+                    yield zone, spaces.result(), windows.result()
+            while pending:
+                zone, spaces, windows = pending.popleft()
+                yield zone, spaces.result(), windows.result()
+
+    def _add_zone(self, builder: BrickModelBuilder, zone: Dict[str, str], spaces: Optional[list] = None, windows: Optional[list] = None):
+        """Add a zone with its thermostat, spaces and windows to the builder, loading the spaces and windows if not given"""
+        zone_id = zone['zone_id']
+        
+        # Add zone
+        builder.add_zone(zone_id)
+        
+        # Add thermostat for the zone
+        builder.add_thermostat(
+            tstat_id=zone['tstat_id'],
+            zone_id=zone_id,
+            stage_count=int(zone['stage_count']),
+            setpoint_deadband=float(zone['setpoint_deadband']),
+            tolerance=float(zone['tolerance']),
+            active=zone['active'].lower() == 'true',
+            resolution=zone['resolution'],
+            unit=zone['temperature_unit']
         )
+
+        # Add spaces for the zone
+        if spaces is None:
+            spaces = self._load_spaces(zone_id)
+        for space in spaces:
+            builder.add_space(
+                space_id=space['space_id'],
+                zone_id=zone_id,
+                area_value=float(space['area_value']),
+                unit=space['area_unit']
+            )
+        # Add windows
+        if windows is None:
+            windows = self._load_windows(zone_id)
+        for window in windows:
+            builder.add_window(
+                window_id=window['window_id'],
+                zone_id=zone_id,
+                area_value=float(window['area_value']),
+                azimuth_value=float(window['azimuth_value']),
+                tilt_value=float(window['tilt_value']),
+                unit=window['area_unit']
+            )
+
+    def _build_isolated(self, add) -> set:
+        """
+        Triples that add(builder) adds to an empty builder.
+        Zones and the site level are built this way so the manifest knows which triples each of them produces.
+        """
+        if not hasattr(self, '_scratch_builder'):
+            self._scratch_builder = BrickModelBuilder(site_id=self.site_info['site_id'], ontology = self.ontology)
+            self._scratch_base = set(self._scratch_builder.model.graph)
+        graph = self._scratch_builder.model.graph
+        graph.remove((None, None, None))
+        graph += self._scratch_base
+        add(self._scratch_builder)
+        return set(graph) - self._scratch_base
+
+    def _zone_triples(self, zone: Dict[str, str], spaces: Optional[list] = None, windows: Optional[list] = None) -> set:
+        return self._build_isolated(lambda builder: self._add_zone(builder, zone, spaces, windows))
+
+    def _site_triples(self) -> set:
+        """Triples of the site info and HVAC units"""
+        return self._build_isolated(self._add_site_level)
+
+    def _add_site_level(self, builder: BrickModelBuilder):
         builder.add_site(
             timezone=self.site_info['timezone'],
             latitude=float(self.site_info['latitude']),
@@ -131,50 +343,8 @@ class SurveyReader:
             building_id=self.site_info['building_id'],
             site_id=self.site_info['site_id']
         )
-        # Process zones and their associated equipment
-        zones = self._load_zones()
-        for zone in zones:
-            zone_id = zone['zone_id']
-            
-            # Add zone
-            builder.add_zone(zone_id)
-            
-            # Add thermostat for the zone
-            builder.add_thermostat(
-                tstat_id=zone['tstat_id'],
-                zone_id=zone_id,
-                stage_count=int(zone['stage_count']),
-                setpoint_deadband=float(zone['setpoint_deadband']),
-                tolerance=float(zone['tolerance']),
-                active=zone['active'].lower() == 'true',
-                resolution=zone['resolution'],
-                unit=zone['temperature_unit']
-            )
-
-            # Add spaces for the zone
-            spaces = self._load_spaces(zone_id)
-            for space in spaces:
-                builder.add_space(
-                    space_id=space['space_id'],
-                    zone_id=zone_id,
-                    area_value=float(space['area_value']),
-                    unit=space['area_unit']
-                )
-            # Add windows
-            windows = self._load_windows(zone_id)
-            for window in windows:
-                builder.add_window(
-                    window_id=window['window_id'],
-                    zone_id=zone_id,
-                    area_value=float(window['area_value']),
-                    azimuth_value=float(window['azimuth_value']),
-                    tilt_value=float(window['tilt_value']),
-                    unit=window['area_unit']
-                )
-
         # Add HVAC units
-        hvac_units = self._load_hvac()
-        for hvac in hvac_units:
+        for hvac in self.iter_hvac():
             if hvac['hvac_id'] in list(self.config['hvacs_feed_zones'].keys()):
                 # TODO: may want to get zone_id from config - a little weird having two sources for this. 
                 builder.add_hvac(
@@ -196,9 +366,176 @@ class SurveyReader:
                     heating_cop=float(hvac['heating_cop'])
                 )
 
+    def _add_zones_sharded(self, builder: BrickModelBuilder, zones: list, workers: int, digests: bool = False) -> Dict[str, set]:
+        """Build the zones in worker processes and merge their triples into the builder, returns each zone's triple digests if digests"""
+        # Zones are independent of each other until HVAC feeds are added, so each worker builds a contiguous shard
+        shard_size = -(-len(zones) // workers)
+        shards = [zones[i:i + shard_size] for i in range(0, len(zones), shard_size)]
+        args = [(str(self.base_dir), self.ontology, shard) for shard in shards]
+        zone_digests = {}
+        # Workers are spawned rather than forked so they don't inherit the parent's BuildingMOTIF session
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            # map keeps shard order, so the merge is deterministic
+            for shard in executor.map(_build_zone_shard, args):
+                for zone_id, data in shard:
+                    triples = _parse_triples(data)
+                    builder.model.graph += triples
+                    if digests:
+                        zone_digests[zone_id] = _triple_digests(triples)
+        return zone_digests
+
+    def _manifest_path(self, output_file: str) -> Path:
+        return Path(f"{output_file}.manifest.json")
+
+    def _survey_hashes(self, zones: list) -> Dict[str, Any]:
+        """Hash the survey files: one hash for the site level files and one per zone for its zone row, spaces and windows"""
+        global_hash = _hash_bytes(
+            json.dumps(self.config, sort_keys=True).encode('utf-8'),
+            self._table_bytes("site_info"),
+            self._table_bytes("hvac_units"),
+        )
+        zone_hashes = {}
+        for zone in zones:
+            zone_id = zone['zone_id']
+            zone_hashes[zone_id] = _hash_bytes(
+                json.dumps(zone, sort_keys=True).encode('utf-8'),
+                self._table_bytes("spaces", zone_id),
+                self._table_bytes("windows", zone_id),
+            )
+        return {"global": global_hash, "zones": zone_hashes}
+
+    def _write_manifest(self, output_file: str, hashes: Dict[str, Any], site_digests: set, zone_digests: Dict[str, set]):
+        """
+        Save the survey hashes next to the model, with digests of the triples the site level and each zone produce,
+        so a zone's triples can be removed later without removing ones that other zones or the site still produce
+        """
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "ontology": self.ontology,
+            "global": hashes["global"],
+            "site": _pack_digests(site_digests),
+            "zones": {
+                zone_id: {"hash": zone_hash, "triples": _pack_digests(zone_digests[zone_id])}
+                for zone_id, zone_hash in hashes["zones"].items()
+            },
+        }
+        with open(self._manifest_path(output_file), 'w') as f:
+            json.dump(manifest, f)
+
+    def _update_model(self, output_file: str) -> bool:
+        """
+        Patch the saved model with the zones whose rows changed since the manifest was written
+
+        Returns:
+            bool: False if the saved model can't be patched and needs a full rebuild
+        """
+        manifest_path = self._manifest_path(output_file)
+        if not manifest_path.exists() or not Path(output_file).exists():
+            print("No saved model manifest found, rebuilding the full model")
+            return False
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("ontology") != self.ontology:
+            print("Saved model manifest is out of date, rebuilding the full model")
+            return False
+        zones = self._load_zones()
+        hashes = self._survey_hashes(zones)
+        if manifest["global"] != hashes["global"]:
+            # site info, config and HVAC units connect zones, so changes to them aren't patched
+            print("Site info, config or HVAC units changed, rebuilding the full model")
+            return False
+
+        old_zones = manifest["zones"]
+        changed_zones = [zone for zone in zones if old_zones.get(zone['zone_id'], {}).get("hash") != hashes["zones"][zone['zone_id']]]
+        current_ids = {zone['zone_id'] for zone in zones}
+        kept_ids = current_ids - {zone['zone_id'] for zone in changed_zones}
+        removed_count = len(set(old_zones) - current_ids)
+
+        builder = BrickModelBuilder(site_id=self.site_info['site_id'], ontology = self.ontology)
+        zone_digests = {zone_id: _unpack_digests(old_zones[zone_id]["triples"]) for zone_id in kept_ids}
+        new_triples = {zone['zone_id']: self._zone_triples(zone) for zone in changed_zones}
+        zone_digests.update({zone_id: _triple_digests(triples) for zone_id, triples in new_triples.items()})
+        site_digests = _unpack_digests(manifest["site"])
+        # triples still produced by the builder, the site level or the current zones are never removed
+        kept_digests = _triple_digests(set(builder.model.graph)) | site_digests
+        kept_digests = kept_digests.union(*zone_digests.values())
+        stale_digests = set()
+        for zone_id, snapshot in old_zones.items():
+            if zone_id not in kept_ids:
+                stale_digests |= _unpack_digests(snapshot["triples"])
+        stale_digests -= kept_digests
+
+        builder.model.graph.parse(output_file)
+        stale_triples = [triple for triple in builder.model.graph if _triple_digest(triple) in stale_digests]
+        for triple in stale_triples:
+            builder.model.graph.remove(triple)
+        for triples in new_triples.values():
+            builder.model.graph += triples
+        print(f"Rebuilt {len(changed_zones)} of {len(zones)} zones, removed {removed_count} zones")
+
+        self.graph = builder.model.graph
+        self.builder = builder
+        builder.save_model(output_file)
+        self._write_manifest(output_file, hashes, site_digests, zone_digests)
+        return True
+
+    def create_model(self, output_file: Union[str, None] = None, workers: Optional[int] = None, incremental: bool = False, read_ahead: int = 2):
+        """Generate the Brick model from the survey data
+        
+        Args:
+            output_file: Optional path to save the model to
+            workers: Number of worker processes used to build zones. If None or 1, zones are built serially.
+                The sharded build gives the same graph as the serial build.
+            incremental: Only rebuild the zones whose zone, space or window rows changed since output_file was
+                saved and patch them into the saved model. Falls back to a full rebuild when there is no manifest,
+                or site info, config or HVAC units changed. A manifest of the survey file hashes, and digests of the
+                triples each zone produces, is saved next to the model as {output_file}.manifest.json for the next
+                incremental build. Without incremental no manifest is written.
+            read_ahead: Number of zones whose spaces and windows are read in a thread pool while the builder
+                adds the current zone, when zones are built serially. 0 reads them in turn.
+        """
+        # the reader can be reused after the survey is edited, e.g. for incremental builds
+        self._clear_caches()
+        if incremental:
+            if not output_file:
+                raise ValueError("An output_file is needed for an incremental build")
+            if self._update_model(output_file):
+                return
+        # digests of the triples each zone produces are only kept for the manifest of incremental builds
+        digests = incremental
+
+        # Tables read while building are validated in full first, so errors don't leave a partly built model
+        self._validate_table("zones", "Zone")
+        self._validate_table("hvac_units", "HVAC")
+        # Initialize the model builder with site information
+        builder = BrickModelBuilder(
+            site_id=self.site_info['site_id'],
+            ontology = self.ontology
+        )
+        # The site level and each zone are built on their own and merged, which gives the same graph as building
+        # them into one builder since only their triples are combined, and tells the manifest what each produced
+        site_triples = self._site_triples()
+        builder.model.graph += site_triples
+        # Process zones and their associated equipment
+        if workers is not None and workers > 1:
+            zones = self._load_zones()
+            zone_digests = self._add_zones_sharded(builder, zones, workers, digests)
+        else:
+            # zones are fed to the builder as they are read, only the zone rows and digests are kept for the manifest
+            zones = []
+            zone_digests = {}
+            for zone, spaces, windows in self.iter_zone_contents(read_ahead):
+                triples = self._zone_triples(zone, spaces, windows)
+                builder.model.graph += triples
+                if digests:
+                    zones.append(zone)
+                    zone_digests[zone['zone_id']] = _triple_digests(triples)
+
         self.graph = builder.model.graph
         self.builder = builder
 
         if output_file:
             # Save the model
-            builder.save_model(output_file)
\ No newline at end of file
+            builder.save_model(output_file)
+            if digests:
+                self._write_manifest(output_file, self._survey_hashes(zones), _triple_digests(site_triples), zone_digests)
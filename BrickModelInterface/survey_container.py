@@ -0,0 +1,117 @@
+# Packed metadata surveys: the whole survey in one SQLite file with one table per entity
+# The directory layout has a spaces and a windows csv per zone, which is slow to open for large buildings
+# and on network file systems. The container holds the same rows, with spaces and windows of all zones in one table.
+import csv
+import json
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+# Survey tables and their location in the directory layout, {zone} marks files written per zone
+SURVEY_TABLE_FILES = {
+    "site_info": "site_info.csv",
+    "zones": "zones/zones.csv",
+    "spaces": "spaces/{zone}_spaces.csv",
+    "windows": "windows/{zone}_windows.csv",
+    "hvac_units": "hvac/hvac_units.csv",
+    "point_list": "point_list.csv",
+}
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def write_survey_container(container_file: Union[str, Path], tables: Dict[str, Tuple[list, list]], config: Dict[str, Any]):
+    """
+    Write a survey container
+
+    Args:
+        container_file: SQLite file to write
+        tables: Maps each table name to (headers, rows), rows shorter than the headers are padded with empty values
+        config: Survey configuration, stored as json in the config table
+    """
+    connection = sqlite3.connect(container_file)
+    try:
+        with connection:
+            connection.execute("CREATE TABLE config (config TEXT NOT NULL)")
+            connection.execute("INSERT INTO config VALUES (?)", (json.dumps(config),))
+            for table, (headers, rows) in tables.items():
+                columns = ", ".join(f"{_quote(header)} TEXT" for header in headers)
+                connection.execute(f"CREATE TABLE {_quote(table)} ({columns})")
+                placeholders = ", ".join("?" * len(headers))
+                connection.executemany(
+                    f"INSERT INTO {_quote(table)} VALUES ({placeholders})",
+                    (list(row) + [""] * (len(headers) - len(row)) for row in rows),
+                )
+    finally:
+        connection.close()
+
+def read_survey_container(container_file: Union[str, Path]) -> Tuple[Dict[str, Any], Dict[str, pd.DataFrame]]:
+    """Read the config and every table of a survey container with one open, tables keep their row order
+    and their values are strings, with None for missing values"""
+    connection = sqlite3.connect(f"file:{Path(container_file).as_posix()}?mode=ro", uri=True)
+    try:
+        config = json.loads(connection.execute("SELECT config FROM config").fetchone()[0])
+        table_names = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'config'")]
+        tables = {
+            table: pd.read_sql_query(f"SELECT * FROM {_quote(table)} ORDER BY rowid", connection)
+            for table in table_names
+        }
+    finally:
+        connection.close()
+    return config, tables
+
+def pack_survey(survey_directory: Union[str, Path], container_file: Union[str, Path]):
+    """Convert a survey directory into a survey container"""
+    survey_directory = Path(survey_directory)
+    if Path(container_file).exists():
+        raise FileExistsError(f"File '{container_file}' already exists. Please use a different path or remove the file.")
+    with open(survey_directory / "config.json", 'r') as f:
+        config = json.load(f)
+    tables = {}
+    for table, file_pattern in SURVEY_TABLE_FILES.items():
+        if "{zone}" in file_pattern:
+            paths = sorted(survey_directory.glob(file_pattern.replace("{zone}", "*")))
+        else:
+            paths = [survey_directory / file_pattern]
+        frames = [pd.read_csv(path, dtype=str, keep_default_na=False, index_col=False) for path in paths if path.exists()]
+        if not frames:
+            continue
+        frame = pd.concat(frames, ignore_index=True)
+        # missing trailing values are stored as NULL, which the reader treats as empty like before
+        rows = frame.astype(object).where(frame.notna(), None).values.tolist()
+        tables[table] = (list(frame.columns), rows)
+    write_survey_container(container_file, tables, config)
+
+def unpack_survey(container_file: Union[str, Path], survey_directory: Union[str, Path]):
+    """Convert a survey container into the survey directory layout written by SurveyGenerator"""
+    survey_directory = Path(survey_directory)
+    if survey_directory.exists() and any(survey_directory.iterdir()):
+        raise FileExistsError(f"Directory '{survey_directory}' already exists and is not empty. Please use a different path or clear the directory.")
+    config, tables = read_survey_container(container_file)
+    for subdir in ["spaces", "hvac", "zones", "windows"]:
+        (survey_directory / subdir).mkdir(parents=True, exist_ok=True)
+    with open(survey_directory / "config.json", 'w') as f:
+        json.dump(config, f, indent=4)
+
+    # zones without spaces or windows still get a file with just the headers
+    zone_files = {
+        "spaces": list(config.get("zones_contain_spaces", {})),
+        "windows": list(config.get("zones_contain_windows", {})),
+    }
+    for table, frame in tables.items():
+        file_pattern = SURVEY_TABLE_FILES.get(table)
+        if file_pattern is None:
+            continue
+        frame = frame.fillna("")
+        if "{zone}" in file_pattern:
+            groups = dict(iter(frame.groupby("zone_id", sort=False)))
+            zones = zone_files[table] + [zone for zone in groups if zone not in zone_files[table]]
+            files = {file_pattern.format(zone=zone): groups.get(zone, frame.iloc[0:0]) for zone in zones}
+        else:
+            files = {file_pattern: frame}
+        for file_name, file_frame in files.items():
+            with open(survey_directory / file_name, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(file_frame.columns)
+                writer.writerows(file_frame.values.tolist())
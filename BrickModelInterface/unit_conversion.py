@@ -5,6 +5,7 @@ from rdflib import Graph, Namespace, Literal, URIRef
 from importlib.resources import files, as_file
 from .namespaces import *
 import csv
+import numpy as np
 
 # Helper --------------------------------------------------------------------
 # When a Python package is installed from a wheel it is often imported from a
@@ -109,4 +110,21 @@ def convert_units(value, from_unit, to_unit, is_delta_quantity=False):
         unit_value = from_conversion_factor / to_conversion_factor * float(value)
     else:
         unit_value = from_conversion_factor / to_conversion_factor * (float(value) + from_offset) - to_offset
-    return unit_value
\ No newline at end of file
+    return unit_value
+
+def get_linear_conversion(from_unit, to_unit, is_delta_quantity=False):
+    """
+    Return (scale, shift) such that scale * value + shift converts value from `from_unit` to `to_unit`.
+    Lets callers look the factors up once and convert many values.
+    """
+    from_conversion_factor, from_offset = _get_conversion_factor(from_unit)
+    to_conversion_factor, to_offset = _get_conversion_factor(to_unit)
+    scale = from_conversion_factor / to_conversion_factor
+    if is_delta_quantity:
+        return scale, 0.0
+    return scale, scale * from_offset - to_offset
+
+def convert_unit_array(values, from_unit, to_unit, is_delta_quantity=False):
+    """Vectorized convert_units for an array of values"""
+    scale, shift = get_linear_conversion(from_unit, to_unit, is_delta_quantity)
+    return scale * np.asarray(values, dtype=float) + shift
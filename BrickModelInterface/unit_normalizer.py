@@ -0,0 +1,99 @@
+# Converts incoming (topic, timestamp, value) records to SI units using the qudt:hasUnit of each point in the model
+# Each topic's unit and conversion are looked up once, then whole batches are converted with numpy.
+import numpy as np
+import pandas as pd
+from itertools import islice
+from typing import Iterable, Iterator, Union
+from rdflib import Graph, URIRef
+from .namespaces import *
+from .point_index import PointIndex, SQLitePointIndex
+from .unit_conversion import get_linear_conversion
+
+# Units the points can be recorded in, mapped to the SI unit values are converted to.
+# Units not listed are already SI or unitless (e.g. percent) and pass through unchanged.
+SI_UNITS = {
+    UNIT["DEG_F"]: UNIT["DEG_C"],
+    UNIT["FT"]: UNIT["M"],
+    UNIT["FT2"]: UNIT["M2"],
+    UNIT["PSI"]: UNIT["PA"],
+    UNIT["BTU_TH-PER-LB"]: UNIT["J-PER-KiloGM"],
+}
+
+RECORD_COLUMNS = ['topic', 'timestamp', 'value']
+
+class UnitNormalizer:
+    """
+    Pipeline stage converting batches of (topic, timestamp, value) records to SI units
+
+    Args:
+        source: PointIndex (or SQLitePointIndex), model graph or path to a model file
+        target_units: Maps units to the unit their values are converted to
+    """
+    def __init__(self, source: Union[PointIndex, SQLitePointIndex, Graph, str], target_units = SI_UNITS):
+        self.index = source if isinstance(source, (PointIndex, SQLitePointIndex)) else PointIndex(source)
+        self.target_units = target_units
+        # topic -> (scale, shift, unit) so each topic costs one index lookup
+        self.conversions = {}
+        # unit -> (scale, shift, unit), shared by every topic in that unit
+        self._unit_conversions = {}
+
+    def _get_unit_conversion(self, unit):
+        if unit not in self._unit_conversions:
+            target_unit = self.target_units.get(unit)
+            if target_unit is None or target_unit == unit:
+                self._unit_conversions[unit] = (1.0, 0.0, unit)
+            else:
+                scale, shift = get_linear_conversion(unit, target_unit)
+                self._unit_conversions[unit] = (scale, shift, target_unit)
+        return self._unit_conversions[unit]
+
+    def get_conversion(self, topic):
+        """Return (scale, shift, SI unit) for a topic, unknown topics and points without units are not converted"""
+        conversion = self.conversions.get(topic)
+        if conversion is None:
+            record = self.index.get(topic)
+            if record is None or record.unit is None:
+                conversion = (1.0, 0.0, None)
+            else:
+                scale, shift, unit = self._get_unit_conversion(URIRef(record.unit))
+                conversion = (scale, shift, str(unit))
+            self.conversions[topic] = conversion
+        return conversion
+
+    def convert_batch(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Convert a dataframe with topic, timestamp and value columns, adding the SI unit of each row"""
+        codes, topics = pd.factorize(batch['topic'])
+        # missing topics get code -1, which indexes the identity conversion appended last
+        conversions = [self.get_conversion(topic) for topic in topics] + [(1.0, 0.0, None)]
+        scales = np.fromiter((conversion[0] for conversion in conversions), dtype=float, count=len(conversions))
+        shifts = np.fromiter((conversion[1] for conversion in conversions), dtype=float, count=len(conversions))
+        units = np.array([conversion[2] for conversion in conversions], dtype=object)
+        values = batch['value'].to_numpy(dtype=float)
+        return pd.DataFrame({
+            'topic': batch['topic'].to_numpy(),
+            'timestamp': batch['timestamp'].to_numpy(),
+            'value': scales[codes] * values + shifts[codes],
+            'unit': units[codes],
+        })
+
+    def normalize(self, records: Union[pd.DataFrame, np.ndarray, Iterable], batch_size = 10000) -> Iterator[pd.DataFrame]:
+        """
+        Yield converted batches of at most batch_size rows
+
+        Args:
+            records: Dataframe or structured array with topic, timestamp and value columns,
+                or any iterable (e.g. a generator) of (topic, timestamp, value) tuples
+            batch_size: Rows per yielded batch
+        """
+        if isinstance(records, np.ndarray):
+            records = pd.DataFrame(records)
+        if isinstance(records, pd.DataFrame):
+            for start in range(0, len(records), batch_size):
+                yield self.convert_batch(records.iloc[start:start + batch_size])
+            return
+        records = iter(records)
+        while True:
+            rows = list(islice(records, batch_size))
+            if not rows:
+                return
+            yield self.convert_batch(pd.DataFrame.from_records(rows, columns=RECORD_COLUMNS))
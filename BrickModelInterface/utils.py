@@ -1,6 +1,8 @@
 from .namespaces import * 
-from rdflib import Graph, URIRef, Literal
+from rdflib import Graph, URIRef, Literal, BNode
 import pandas as pd
+import re
+import gzip
 from typing import Optional
 
 
@@ -24,41 +26,212 @@ def query_to_df(query, g: Graph):
     df = pd.DataFrame(formatted_results, columns=[str(var) for var in results.vars])
     return df
 
-def add_brick_inverse_relations(g):
-    # Dictionary of relationships and their inverses
-    inverse_pairs = {
-        BRICK.isFedBy: BRICK.feeds,
-        BRICK.feeds: BRICK.isFedBy,
-        BRICK.hasPart: BRICK.isPartOf,
-        BRICK.isPartOf: BRICK.hasPart,
-        BRICK.hasPoint: BRICK.isPointOf,
-        BRICK.isPointOf: BRICK.hasPoint,
-        BRICK.hasLocation: BRICK.isLocationOf,
-        BRICK.isLocationOf: BRICK.hasLocation,
-        BRICK.controls: BRICK.isControlledBy,
-        BRICK.isControlledBy: BRICK.controls,
-        BRICK.affects: BRICK.isAffectedBy,
-        BRICK.isAffectedBy: BRICK.affects,
-        BRICK.hasInput: BRICK.isInputOf,
-        BRICK.isInputOf: BRICK.hasInput,
-        BRICK.hasOutput: BRICK.isOutputOf,
-        BRICK.isOutputOf: BRICK.hasOutput,
-        BRICK.measures: BRICK.isMeasuredBy,
-        BRICK.isMeasuredBy: BRICK.measures,
-        BRICK.regulates: BRICK.isRegulatedBy,
-        BRICK.isRegulatedBy: BRICK.regulates,
-        BRICK.hasSubject: BRICK.isSubjectOf,
-        BRICK.isSubjectOf: BRICK.hasSubject
-    }
-    # For each relationship in the graph, add its inverse
-    for s, p, o in g:
-        if p in inverse_pairs:
-            g.add((o, inverse_pairs[p], s))
+# Dictionary of relationships and their inverses
+BRICK_INVERSE_RELATIONS = {
+    BRICK.isFedBy: BRICK.feeds,
+    BRICK.feeds: BRICK.isFedBy,
+    BRICK.hasPart: BRICK.isPartOf,
+    BRICK.isPartOf: BRICK.hasPart,
+    BRICK.hasPoint: BRICK.isPointOf,
+    BRICK.isPointOf: BRICK.hasPoint,
+    BRICK.hasLocation: BRICK.isLocationOf,
+    BRICK.isLocationOf: BRICK.hasLocation,
+    BRICK.controls: BRICK.isControlledBy,
+    BRICK.isControlledBy: BRICK.controls,
+    BRICK.affects: BRICK.isAffectedBy,
+    BRICK.isAffectedBy: BRICK.affects,
+    BRICK.hasInput: BRICK.isInputOf,
+    BRICK.isInputOf: BRICK.hasInput,
+    BRICK.hasOutput: BRICK.isOutputOf,
+    BRICK.isOutputOf: BRICK.hasOutput,
+    BRICK.measures: BRICK.isMeasuredBy,
+    BRICK.isMeasuredBy: BRICK.measures,
+    BRICK.regulates: BRICK.isRegulatedBy,
+    BRICK.isRegulatedBy: BRICK.regulates,
+    BRICK.hasSubject: BRICK.isSubjectOf,
+    BRICK.isSubjectOf: BRICK.hasSubject
+}
+
+def get_brick_inverse_relations(g):
+    """Return the set of inverse triples missing from the graph.
+
+    Only the predicates in BRICK_INVERSE_RELATIONS are looked up (through the
+    predicate index), so the cost scales with the number of relationships and
+    not with the size of the graph. The graph is not modified.
+    """
+    inverses = set()
+    for p, inverse_p in BRICK_INVERSE_RELATIONS.items():
+        for s, o in g.subject_objects(p):
+            triple = (o, inverse_p, s)
+            if triple not in g:
+                inverses.add(triple)
+    return inverses
 
+def add_brick_inverse_relations(g):
+    # Collect first, then bulk add, so the graph is never changed while iterating over it
+    inverses = get_brick_inverse_relations(g)
+    g.addN((s, p, o, g) for s, p, o in inverses)
+    print(f"Added {len(inverses)} inverse relations")
     return g
 
+# Direction kept for each relationship pair when inverses are not materialized
+BRICK_CANONICAL_RELATIONS = {
+    BRICK.isFedBy: BRICK.feeds,
+    BRICK.isPartOf: BRICK.hasPart,
+    BRICK.isPointOf: BRICK.hasPoint,
+    BRICK.isLocationOf: BRICK.hasLocation,
+    BRICK.isControlledBy: BRICK.controls,
+    BRICK.isAffectedBy: BRICK.affects,
+    BRICK.isInputOf: BRICK.hasInput,
+    BRICK.isOutputOf: BRICK.hasOutput,
+    BRICK.isMeasuredBy: BRICK.measures,
+    BRICK.isRegulatedBy: BRICK.regulates,
+    BRICK.isSubjectOf: BRICK.hasSubject
+}
+
+def canonicalize_brick_relations(g):
+    """Copy a graph with every relationship in its canonical direction.
+
+    Inverse triples (e.g. brick:isFedBy) are replaced by the canonical triple
+    (brick:feeds) so that each relationship is stored exactly once. Queries
+    written against the inverse predicates can be run on the result through
+    rewrite_brick_inverse_query. The input graph is not modified.
+    """
+    canonical_graph = Graph()
+    for prefix, namespace in g.namespaces():
+        canonical_graph.bind(prefix, namespace)
+    canonical_graph.addN((s, p, o, canonical_graph) for s, p, o in g if p not in BRICK_CANONICAL_RELATIONS)
+    removed = 0
+    for p, canonical_p in BRICK_CANONICAL_RELATIONS.items():
+        for s, o in g.subject_objects(p):
+            removed += 1
+            canonical_graph.add((o, canonical_p, s))
+    print(f"Removed {removed} inverse relations")
+    return canonical_graph
+
+_BRICK_INVERSE_NAMES = "|".join(str(p).split("#")[-1] for p in BRICK_CANONICAL_RELATIONS)
+# Strings, comments and IRIs are matched as whole tokens so that only predicates in the query itself are rewritten,
+# never text inside a literal, a comment or an unrelated IRI
+_SPARQL_SKIPPED_TOKENS = [
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""',
+    r"'''(?:[^'\\]|\\.|'(?!''))*'''",
+    r'"(?:[^"\\\n]|\\.)*"',
+    r"'(?:[^'\\\n]|\\.)*'",
+    r"#[^\n]*",
+]
+_BRICK_INVERSE_QUERY_PATTERN = re.compile(
+    rf"<{re.escape(str(BRICK))}(?P<iri>{_BRICK_INVERSE_NAMES})>"
+    r"|<[^<>\"{}|^`\\\s]*>"
+    rf"|(?<![\w:-])brick:(?P<name>{_BRICK_INVERSE_NAMES})(?![\w-])"
+    "|" + "|".join(_SPARQL_SKIPPED_TOKENS)
+)
+
+def rewrite_brick_inverse_query(query):
+    """Rewrite a SPARQL query so it runs on a graph with only canonical relations.
+
+    Each inverse predicate (brick:isFedBy, brick:isPartOf, ...) is replaced by
+    the inverse path of its canonical predicate, e.g. (^brick:feeds), so the
+    query returns the same results as on a graph with materialized inverses.
+    String literals, comments and other IRIs are left as they are.
+    """
+    def _replace(match):
+        name = match.group('iri') or match.group('name')
+        if name is None:
+            return match.group(0)
+        return f"(^<{BRICK_CANONICAL_RELATIONS[BRICK[name]]}>)"
+    return _BRICK_INVERSE_QUERY_PATTERN.sub(_replace, query)
+
+def _open_compressed(filename, compression=None):
+    if compression is None:
+        return open(filename, 'wb')
+    if compression == 'gzip':
+        return gzip.open(filename, 'wb')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        return zstandard.open(filename, 'wb')
+    raise ValueError("Invalid compression. Must be None, 'gzip' or 'zstd'")
+
+_NQUADS_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'})
+
+def _nquads_term(term):
+    if isinstance(term, Literal):
+        row = '"' + str(term).translate(_NQUADS_ESCAPES) + '"'
+        if term.language:
+            return f"{row}@{term.language}"
+        if term.datatype:
+            return f"{row}^^<{term.datatype}>"
+        return row
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return f"<{term}>"
+
+def _nquads_row(triple, graph_name):
+    """One N-Quads line, formatted here so graphs can be streamed without building a dataset"""
+    return " ".join(_nquads_term(term) for term in (*triple, graph_name)) + " .\n"
+
+def serialize_graph(g, filename, format='turtle', compression=None):
+    """Serialize a graph to a file, optionally compressed.
+
+    'nt' and 'nquads' are written row by row as the graph is iterated, without
+    building the whole document in memory. Any other rdflib format (e.g. the
+    default 'turtle') goes through the regular rdflib serializer.
+
+    Args:
+        g: Graph to serialize
+        filename: Output file path
+        format: rdflib serialization format
+        compression: None, 'gzip' or 'zstd'
+    """
+    with _open_compressed(filename, compression) as f:
+        if format == 'nquads' and not g.context_aware:
+            # rdflib only writes N-Quads for datasets, so use the graph identifier as the graph name
+            for triple in g:
+                f.write(_nquads_row(triple, g.identifier).encode('utf-8'))
+        else:
+            g.serialize(f, format=format, encoding='utf-8')
+
+
+class UniqueURIAllocator:
+    """Mint unique URIs for a graph without probing every candidate suffix.
+
+    Gives the same names as get_unique_uri (uri, uri-1, uri-2, ...) but keeps
+    the set of subjects and objects in the graph and the next suffix to try
+    for each base URI, so each allocation is O(1) amortized. Nodes added to
+    the graph by other code are still detected; nodes must not be removed
+    while the allocator is in use.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.known = set(graph.subjects()) | set(graph.objects())
+        self.counters = {}
+
+    def _is_used(self, uri):
+        if uri in self.known:
+            return True
+        if (uri, None, None) in self.graph or (None, None, uri) in self.graph:
+            self.known.add(uri)
+            return True
+        return False
+
+    def allocate(self, uri):
+        base_uri = str(uri)
+        new_uri = URIRef(base_uri)
+        if self._is_used(new_uri):
+            count = self.counters.get(base_uri, 1)
+            new_uri = URIRef(f"{base_uri}-{count}")
+            while self._is_used(new_uri):
+                count += 1
+                new_uri = URIRef(f"{base_uri}-{count}")
+            self.counters[base_uri] = count + 1
+        self.known.add(new_uri)
+        return new_uri
 
-def get_unique_uri(graph, uri):
+def get_unique_uri(graph, uri, allocator: Optional[UniqueURIAllocator] = None):
+    if allocator is not None:
+        return allocator.allocate(uri)
     base_uri = str(uri)
     count = 1
     new_uri = URIRef(base_uri)
@@ -75,7 +248,7 @@ def get_uri_name(graph, uri):
     else:
         return uri
 
-def create_uri_name_from_uris(graph,ns, uri_lst, suffix: Optional[str] = ""):
+def create_uri_name_from_uris(graph,ns, uri_lst, suffix: Optional[str] = "", allocator: Optional[UniqueURIAllocator] = None):
     # append uri names in namespace and check uniqueness against graph
     # URI list may not be all uris
     node_names = []
@@ -84,6 +257,6 @@ def create_uri_name_from_uris(graph,ns, uri_lst, suffix: Optional[str] = ""):
             node_names.append(get_uri_name(graph, uri))
         else:
             node_names.append(uri)
-    new_uri = get_unique_uri(graph, ns[f"{'_'.join(node_names)}{suffix}"])
+    new_uri = get_unique_uri(graph, ns[f"{'_'.join(node_names)}{suffix}"], allocator)
     graph.add((new_uri, RDFS.label, Literal(get_uri_name(graph, new_uri))))
     return new_uri
\ No newline at end of file
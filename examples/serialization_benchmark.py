@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Model Serialization Benchmark
+
+This example builds a synthetic Brick model and compares serialization time,
+peak memory and file size of the formats and compressions supported by
+BrickModelBuilder.save_model.
+
+Usage: python serialization_benchmark.py [number_of_zones]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from BrickModelInterface import BrickModelBuilder
+from BrickModelInterface.utils import serialize_graph
+
+FORMATS = [
+    ("turtle", None, "ttl"),
+    ("nt", None, "nt"),
+    ("nt", "gzip", "nt.gz"),
+    ("nquads", None, "nq"),
+    ("nquads", "gzip", "nq.gz"),
+]
+
+
+def build_model(zone_count):
+    """Build a model with one thermostat, space, window and HVAC unit per zone."""
+    builder = BrickModelBuilder(site_id="benchmark_site", system_of_units="IP")
+    for i in range(zone_count):
+        zone_id = f"zone{i}"
+        builder.add_zone(zone_id)
+        builder.add_thermostat(f"tstat{i}", zone_id, 2, 1.0, 0.5, True, 0.1)
+        builder.add_space(f"space{i}", zone_id, 100.0, "FT2")
+        builder.add_window(f"window{i}", zone_id, 10.0, 180.0, 90.0)
+        builder.add_hvac(f"hvac{i}", zone_id, 10.0, 10.0, 3.0, 3.0)
+    return builder
+
+
+def main():
+    """Run the serialization benchmark."""
+    zone_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    formats = list(FORMATS)
+    try:
+        import zstandard  # noqa: F401
+        formats += [("nt", "zstd", "nt.zst")]
+    except ImportError:
+        print("zstandard not installed, skipping zstd")
+
+    print(f"Building model with {zone_count} zones...")
+    graph = build_model(zone_count).model.graph
+    print(f"Model has {len(graph)} triples\n")
+
+    print(f"{'format':<10}{'compression':<14}{'time (s)':>10}{'peak (MB)':>12}{'size (kB)':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for format, compression, extension in formats:
+            filename = os.path.join(tmpdir, f"model.{extension}")
+            tracemalloc.start()
+            start = time.perf_counter()
+            serialize_graph(graph, filename, format=format, compression=compression)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = os.path.getsize(filename)
+            print(f"{format:<10}{str(compression):<14}{elapsed:>10.3f}{peak / 1e6:>12.2f}{size / 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Shared fixtures for tests of models with points
+"""
+
+import pandas as pd
+import pytest
+
+from BrickModelInterface import BrickModelBuilder, add_points
+from BrickModelInterface.utils import add_brick_inverse_relations
+
+# Zone and equipment points of zone1 and zone2, fed by hvac1 and hvac2
+POINTS = [
+    {
+        "topic_name": "campus/bldg/zone1/ZoneTemperature",
+        "zone_id": "zone1",
+        "unit_type": "F",
+        "point type": "Zone Air Temperature Sensor",
+        "equipment": "domainSpace",
+    },
+    {
+        "topic_name": "campus/bldg/zone1/CoolingSetpoint",
+        "zone_id": "zone1",
+        "unit_type": "F",
+        "point type": "Cooling Temperature Setpoint",
+        "equipment": "domainSpace",
+    },
+    {
+        "topic_name": "campus/bldg/hvac1/DamperCommand",
+        "zone_id": "zone1",
+        "unit_type": "%",
+        "point type": "Damper Position Command",
+        "equipment": "hvac",
+    },
+    {
+        "topic_name": "campus/bldg/hvac2/FanStatus",
+        "zone_id": "zone2",
+        "unit_type": "none",
+        "point type": "Fan Status",
+        "equipment": "hvac",
+    },
+    {
+        "topic_name": "campus/bldg/hvac1/Status",
+        "zone_id": "zone1",
+        "unit_type": "none",
+        "point type": "Status",
+        "equipment": "hvac",
+    },
+]
+
+
+@pytest.fixture(scope="session")
+def points():
+    """Rows of the point mapping file."""
+    return [dict(point) for point in POINTS]
+
+
+@pytest.fixture(scope="session")
+def mapping_file(tmp_path_factory, points):
+    """Point mapping CSV with zone and equipment points."""
+    path = tmp_path_factory.mktemp("points") / "points.csv"
+    pd.DataFrame(points).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="session")
+def make_builder():
+    """Factory of builders with a site and two zones, each fed by one HVAC unit."""
+
+    def make(mapping_file=None):
+        builder = BrickModelBuilder(site_id="test_site")
+        builder.add_site("America/Denver", 40.0, -105.0, "KBDU", "bldg", "test_site")
+        for i in [1, 2]:
+            builder.add_zone(f"zone{i}")
+            builder.add_hvac(f"hvac{i}", f"zone{i}", 10.0, 10.0, 3.0, 3.0)
+        if mapping_file is not None:
+            add_points(builder, mapping_file)
+        return builder
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def point_model(make_builder, mapping_file):
+    """Builder with the mapping file points and inverse relations, as saved."""
+    builder = make_builder(mapping_file)
+    add_brick_inverse_relations(builder.model.graph)
+    return builder
+
+
+@pytest.fixture(scope="session")
+def model_file(tmp_path_factory, point_model):
+    """Saved model of point_model."""
+    path = tmp_path_factory.mktemp("model") / "model.ttl"
+    point_model.save_model(str(path))
+    return str(path)
@@ -0,0 +1,359 @@
+"""
+Tests for generating Grafana dashboards from Brick models
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+from rdflib import RDFS, Graph
+
+from BrickModelInterface import BrickToGrafana
+from BrickModelInterface.brick_hierarchy import (
+    BRICK_VERSION,
+    compute_class_closure,
+    get_subclasses,
+    load_class_closure,
+)
+from BrickModelInterface.grafana_uploader import dashboard_hash
+from BrickModelInterface.namespaces import BRICK
+from BrickModelInterface.utils import canonicalize_brick_relations
+
+
+@pytest.fixture
+def grafana(model_file):
+    """BrickToGrafana for the saved model."""
+    return BrickToGrafana("http://localhost:3000/", "key", "historian", model_file)
+
+
+def panel_targets(dashboard):
+    """Map each panel title to the refIds of its targets."""
+    return {
+        panel.title: sorted(target.refId for target in panel.targets)
+        for panel in dashboard.panels
+    }
+
+
+@pytest.fixture
+def historian(points):
+    """In memory VOLTTRON historian with two readings for every point."""
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE topics (topic_id INTEGER PRIMARY KEY, topic_name TEXT)"
+    )
+    connection.execute(
+        "CREATE TABLE data (ts TIMESTAMP, topic_id INTEGER, value_string TEXT)"
+    )
+    for topic_id, point in enumerate(points):
+        connection.execute(
+            "INSERT INTO topics VALUES (?, ?)", (topic_id, point["topic_name"])
+        )
+        for minute in range(2):
+            connection.execute(
+                "INSERT INTO data VALUES (?, ?, ?)",
+                (f"2024-01-01 00:0{minute}:00", topic_id, str(topic_id + minute)),
+            )
+    return connection
+
+
+GRAFANA_MACROS = {
+    "$__timeFilter(data.ts)": "1 = 1",
+    "$__timeFilter(ts)": "1 = 1",
+    # hourly buckets
+    "$__timeGroupAlias(ts, $__interval)": 'substr(ts, 1, 13) AS "time"',
+    "$__timeGroup(data.ts, $__interval)": "substr(data.ts, 1, 13)",
+    # single value of a repeated panel
+    "${zone:sqlstring}": "'zone1'",
+    "${equipment:sqlstring}": "'hvac2'",
+    "${site:sqlstring}": "'test_site'",
+}
+
+
+def run_grafana_sql(connection, sql):
+    """Run generated SQL with the Grafana macros replaced."""
+    for macro, replacement in GRAFANA_MACROS.items():
+        sql = sql.replace(macro, replacement)
+    return connection.execute(sql).fetchall()
+
+
+class TestBrickClassHierarchy:
+    """Test cases for the precompiled Brick class hierarchy."""
+
+    def test_shipped_closure(self):
+        """Test that the shipped closure resolves indirect superclasses."""
+        closure = load_class_closure(BRICK_VERSION)
+
+        assert {
+            "Air_Temperature_Sensor",
+            "Temperature_Sensor",
+            "Sensor",
+            "Point",
+        } <= closure["Zone_Air_Temperature_Sensor"]
+        assert "Zone" in closure["HVAC_Zone"]
+        assert {"Zone", "HVAC_Zone"} <= get_subclasses(closure, "Zone")
+
+    def test_compute_closure(self):
+        """Test that the closure follows subclass chains below the roots only."""
+        ontology = Graph()
+        ontology.add((BRICK.Sensor, RDFS.subClassOf, BRICK.Point))
+        ontology.add((BRICK.Temperature_Sensor, RDFS.subClassOf, BRICK.Sensor))
+        ontology.add((BRICK.Thing, RDFS.subClassOf, BRICK.Other))
+
+        closure = compute_class_closure(ontology)
+
+        assert closure == {
+            "Sensor": {"Point"},
+            "Temperature_Sensor": {"Sensor", "Point"},
+        }
+
+
+class TestBrickToGrafana:
+    """Test cases for BrickToGrafana."""
+
+    def test_dashboard_panels(self, grafana):
+        """Test that points are grouped into a panel per zone or equipment."""
+        dashboard = grafana.create_dashboard("test")
+
+        assert panel_targets(dashboard) == {
+            "zone1": ["Cooling_Temperature_Setpoint", "Zone_Air_Temperature_Sensor"],
+            "hvac1": ["Damper_Position_Command", "Status"],
+            "hvac2": ["Fan_Status"],
+        }
+
+    def test_point_type_selection(self, grafana):
+        """Test that only points below the requested classes are selected."""
+        dashboard = grafana.create_dashboard(
+            "test", point_types=["Temperature_Sensor", "Status"]
+        )
+
+        assert panel_targets(dashboard) == {
+            "zone1": ["Zone_Air_Temperature_Sensor"],
+            "hvac1": ["Status"],
+            "hvac2": ["Fan_Status"],
+        }
+
+    def test_point_families(self, grafana):
+        """Test that each point gets the first requested family of its class."""
+        points = grafana._get_points(["Sensor", "Setpoint", "Command", "Status"])
+
+        assert [
+            (point.panel, point.point_type, point.family, point.topic)
+            for point in points
+        ] == [
+            (
+                "hvac1",
+                "Damper_Position_Command",
+                "Command",
+                "campus/bldg/hvac1/DamperCommand",
+            ),
+            ("hvac1", "Status", "Status", "campus/bldg/hvac1/Status"),
+            ("hvac2", "Fan_Status", "Status", "campus/bldg/hvac2/FanStatus"),
+            (
+                "zone1",
+                "Cooling_Temperature_Setpoint",
+                "Setpoint",
+                "campus/bldg/zone1/CoolingSetpoint",
+            ),
+            (
+                "zone1",
+                "Zone_Air_Temperature_Sensor",
+                "Sensor",
+                "campus/bldg/zone1/ZoneTemperature",
+            ),
+        ]
+
+    def test_panel_query_mode(self, historian, grafana):
+        """Test that panel mode runs one query per panel, labeled by point type."""
+        dashboard = grafana.create_dashboard("test", query_mode="panel")
+
+        targets = {panel.title: panel.targets for panel in dashboard.panels}
+        assert {
+            title: len(panel_targets) for title, panel_targets in targets.items()
+        } == {"zone1": 1, "hvac1": 1, "hvac2": 1}
+        rows = run_grafana_sql(historian, targets["zone1"][0].rawSql)
+        assert sorted(rows) == [
+            ("2024-01-01 00:00:00", "Cooling_Temperature_Setpoint", 1.0),
+            ("2024-01-01 00:00:00", "Zone_Air_Temperature_Sensor", 0.0),
+            ("2024-01-01 00:01:00", "Cooling_Temperature_Setpoint", 2.0),
+            ("2024-01-01 00:01:00", "Zone_Air_Temperature_Sensor", 1.0),
+        ]
+
+    def test_invalid_query_mode(self, grafana):
+        """Test that unknown query modes are rejected."""
+        with pytest.raises(ValueError, match="query_mode"):
+            grafana.create_dashboard("test", query_mode="zone")
+
+    def test_aggregation_per_family(self, historian, grafana):
+        """Test that points are aggregated by family, and other families stay raw."""
+        dashboard = grafana.create_dashboard(
+            "test", aggregation={"Sensor": "avg", "Setpoint": "max"}
+        )
+
+        sql = {
+            target.refId: target.rawSql
+            for panel in dashboard.panels
+            for target in panel.targets
+        }
+        assert run_grafana_sql(historian, sql["Zone_Air_Temperature_Sensor"]) == [
+            ("2024-01-01 00", 0.5)
+        ]
+        assert run_grafana_sql(historian, sql["Cooling_Temperature_Setpoint"]) == [
+            ("2024-01-01 00", 2.0)
+        ]
+        assert len(run_grafana_sql(historian, sql["Fan_Status"])) == 2
+
+    def test_aggregated_panel_query(self, historian, grafana):
+        """Test that panel mode combines aggregated and raw points in one query."""
+        dashboard = grafana.create_dashboard(
+            "test", query_mode="panel", aggregation={"Sensor": "min"}
+        )
+
+        zone_sql = next(
+            panel.targets[0].rawSql
+            for panel in dashboard.panels
+            if panel.title == "zone1"
+        )
+        assert sorted(run_grafana_sql(historian, zone_sql)) == [
+            ("2024-01-01 00", "Zone_Air_Temperature_Sensor", 0.0),
+            ("2024-01-01 00:00:00", "Cooling_Temperature_Setpoint", 1.0),
+            ("2024-01-01 00:01:00", "Cooling_Temperature_Setpoint", 2.0),
+        ]
+
+    def test_invalid_aggregation(self, grafana):
+        """Test that unknown aggregations are rejected."""
+        with pytest.raises(ValueError, match="aggregation"):
+            grafana.create_dashboard("test", aggregation="median")
+
+    def test_templated_dashboard(self, historian, grafana):
+        """Test that zone and equipment panels repeat by variables from the model."""
+        dashboard = grafana.create_templated_dashboard(
+            "test", aggregation={"Status": "max"}
+        )
+
+        templates = {template.name: template for template in dashboard.templating.list}
+        assert [template.name for template in dashboard.templating.list] == [
+            "site",
+            "zone",
+            "equipment",
+        ]
+        assert templates["site"].query == "test_site"
+        assert templates["zone"].multi and templates["zone"].includeAll
+        panels = {panel.title: panel for panel in dashboard.panels}
+        assert {title: panel.repeat.variable for title, panel in panels.items()} == {
+            "$zone": "zone",
+            "$equipment": "equipment",
+        }
+
+        # zone and equipment values are queried for the selected site
+        assert run_grafana_sql(historian, templates["zone"].query) == [("zone1",)]
+        assert run_grafana_sql(historian, templates["equipment"].query) == [
+            ("hvac1",),
+            ("hvac2",),
+        ]
+        other_site = templates["zone"].query.replace(
+            "${site:sqlstring}", "'other_site'"
+        )
+        assert run_grafana_sql(historian, other_site) == []
+        zone_rows = run_grafana_sql(historian, panels["$zone"].targets[0].rawSql)
+        assert sorted(zone_rows) == [
+            ("2024-01-01 00:00:00", "Cooling_Temperature_Setpoint", 1.0),
+            ("2024-01-01 00:00:00", "Zone_Air_Temperature_Sensor", 0.0),
+            ("2024-01-01 00:01:00", "Cooling_Temperature_Setpoint", 2.0),
+            ("2024-01-01 00:01:00", "Zone_Air_Temperature_Sensor", 1.0),
+        ]
+        equipment_rows = run_grafana_sql(
+            historian, panels["$equipment"].targets[0].rawSql
+        )
+        assert equipment_rows == [("2024-01-01 00", "Fan_Status", 4.0)]
+
+    def test_sqlite_ddl(self, historian, grafana, tmp_path):
+        """Test that the DDL creates the covering index and per panel rollups."""
+        ddl_file = tmp_path / "historian.sql"
+        grafana.write_ddl(ddl_file, dialect="sqlite", rollup="table")
+
+        historian.executescript(ddl_file.read_text())
+        plan = historian.execute(
+            "EXPLAIN QUERY PLAN SELECT ts, value_string FROM data "
+            "WHERE topic_id = 1 AND ts > '2024-01-01'"
+        ).fetchall()
+        assert "COVERING INDEX data_topic_id_ts_idx" in plan[0][-1]
+        assert historian.execute(
+            "SELECT * FROM rollup_zone1 ORDER BY metric"
+        ).fetchall() == [
+            ("2024-01-01 00:00:00", "Cooling_Temperature_Setpoint", 1.5, 1.0, 2.0),
+            ("2024-01-01 00:00:00", "Zone_Air_Temperature_Sensor", 0.5, 0.0, 1.0),
+        ]
+        assert historian.execute(
+            "SELECT metric, max_value FROM rollup_hvac2"
+        ).fetchall() == [("Fan_Status", 4.0)]
+
+    def test_postgresql_ddl(self, grafana):
+        """Test that PostgreSQL rollups are materialized views, not on SQLite."""
+        ddl = grafana.get_ddl(rollup="view", rollup_interval="day")
+
+        assert "INCLUDE (value_string)" in ddl
+        assert 'CREATE MATERIALIZED VIEW "rollup_zone1"' in ddl
+        assert "date_trunc('day', data.ts)" in ddl
+        with pytest.raises(ValueError, match="rollup"):
+            grafana.get_ddl(dialect="sqlite", rollup="view")
+
+    @pytest.mark.parametrize("suffix", ["json", "parquet"])
+    def test_inventory(self, grafana, tmp_path, suffix):
+        """Test that dashboards from an exported inventory match the model's."""
+        if suffix == "parquet":
+            pytest.importorskip("pyarrow")
+        inventory_file = tmp_path / f"inventory.{suffix}"
+        grafana.export_inventory(inventory_file)
+
+        from_inventory = BrickToGrafana(
+            "http://localhost:3000/", "key", "historian", inventory=inventory_file
+        )
+
+        assert from_inventory.g is None
+        for point_types in [
+            ["Sensor", "Setpoint", "Command", "Status"],
+            ["Temperature_Sensor", "Status"],
+        ]:
+            assert from_inventory._get_points(point_types) == grafana._get_points(
+                point_types
+            )
+        assert panel_targets(from_inventory.create_dashboard("test")) == panel_targets(
+            grafana.create_dashboard("test")
+        )
+
+    def test_virtual_inverse_model(self, grafana, model_file, tmp_path):
+        """Test that a model with only canonical relations gives the same points."""
+        virtual_file = tmp_path / "virtual.ttl"
+        canonicalize_brick_relations(Graph().parse(model_file)).serialize(
+            virtual_file, format="turtle"
+        )
+        inverse_ref = (
+            "?point brick:isPointOf ?owner . "
+            "?point ref:hasExternalReference/ref:hasTopic ?point_id ."
+        )
+
+        for virtual_inverse_relations in [False, True]:
+            virtual = BrickToGrafana(
+                "http://localhost:3000/",
+                "key",
+                "historian",
+                str(virtual_file),
+                virtual_inverse_relations,
+            )
+            assert virtual._get_points(["Point"]) == grafana._get_points(["Point"])
+        assert virtual._get_points(["Point"], inverse_ref) == grafana._get_points(
+            ["Point"], inverse_ref
+        )
+
+    def test_dashboards_on_one_instance(self, grafana):
+        """Test that dashboards created by one instance only hold their own panels."""
+        grafana.create_dashboard("first")
+        grafana.create_dashboard("second")
+        templated = grafana.create_templated_dashboard("templated")
+
+        assert [panel.title for panel in templated.panels] == ["$zone", "$equipment"]
+        assert len(grafana.create_dashboard("third").panels) == 3
+        # unchanged dashboards hash the same, so the uploader skips them
+        assert dashboard_hash(grafana.create_dashboard("third")) == dashboard_hash(
+            grafana.create_dashboard("third")
+        )
@@ -0,0 +1,125 @@
+"""
+Tests for classifying VOLTTRON topics into point mapping files
+"""
+
+import pytest
+
+from BrickModelInterface import (
+    BrickModelBuilder,
+    PointClassifier,
+    add_points,
+    classify_points,
+)
+from BrickModelInterface.namespaces import BRICK, QUDT, RDF, UNIT
+
+TOPICS = [
+    "campus/bldg/rtu1/ZoneTemperature",
+    "campus/bldg/rtu1/OccupiedCoolingSetPoint",
+    "campus/bldg/rtu1/SupplyFan1Status",
+    "campus/bldg/rtu1/OAT",
+    "campus/bldg/rtu1/Ratio",
+]
+
+
+class TestPointClassifier:
+    """Test cases for PointClassifier."""
+
+    @pytest.mark.parametrize(
+        "point_name, tokens",
+        [
+            ("ZoneTemperature", ["zone", "temperature"]),
+            ("zntempsp", ["zone", "temperature", "setpoint"]),
+            ("UnoccHtgSp", ["unoccupied", "heating", "setpoint"]),
+            ("Fan_Speed_Cmd", ["fan", "speed", "command"]),
+            ("ZoneCO2", ["zone", "co2"]),
+            ("OAT", ["outside", "air", "temperature"]),
+        ],
+    )
+    def test_tokenize(self, point_name, tokens):
+        """Test that camel case, separators and run together abbreviations are split."""
+        assert PointClassifier().tokenize(point_name) == tokens
+
+    def test_most_specific_rule_wins(self):
+        """Test that the rule with the most matching tokens is used."""
+        classifier = PointClassifier()
+        assert classifier.classify_name("ZoneTemp") == (
+            "Zone Air Temperature Sensor",
+            "F",
+            True,
+        )
+        assert classifier.classify_name("ZoneTempSetPoint") == (
+            "Zone Air Temperature Setpoint",
+            "F",
+            True,
+        )
+        assert classifier.classify_name("DamperPosition") == (
+            "Damper Position Command",
+            "%",
+            False,
+        )
+        assert classifier.classify_name("Ratio") == (None, "", False)
+
+    def test_s223_classes(self):
+        """Test that 223 points are typed by the family of their Brick class."""
+        classifier = PointClassifier(ontology="s223", temperature_unit="DEG_C")
+        assert classifier.classify_name("ZoneTemp") == (
+            "QuantifiableObservableProperty",
+            "DEG_C",
+            True,
+        )
+        assert (
+            classifier.classify_name("FanStatus")[0] == "EnumeratedObservableProperty"
+        )
+
+    def test_invalid_ontology(self):
+        """Test that unknown ontologies are rejected."""
+        with pytest.raises(ValueError):
+            PointClassifier(ontology="haystack")
+
+
+class TestClassifyPoints:
+    """Test cases for classify_points."""
+
+    def test_mapping_columns(self, capsys):
+        """Test that zones, equipment and unclassified topics are filled in."""
+        mapping_df = classify_points(TOPICS, zone_map={"rtu1": "zone1"})
+
+        assert list(mapping_df.columns) == [
+            "topic_name",
+            "zone_id",
+            "unit_type",
+            "point type",
+            "equipment",
+        ]
+        assert list(mapping_df["zone_id"]) == ["zone1"] * len(TOPICS)
+        assert list(mapping_df["equipment"]) == [
+            "domainSpace",
+            "domainSpace",
+            "rtu1",
+            "rtu1",
+            "rtu1",
+        ]
+        assert mapping_df["point type"].iloc[-1] == "Point"
+        assert "1 topics could not be classified" in capsys.readouterr().out
+
+    def test_mapping_file_round_trip(self, tmp_path):
+        """Test that the written mapping file can be added to a model."""
+        path = tmp_path / "points.csv"
+        classify_points(TOPICS, path, zone_map={"rtu1": "zone1"})
+        builder = BrickModelBuilder(site_id="test_site")
+        builder.add_zone("zone1")
+        builder.add_hvac("rtu1", "zone1", 10.0, 10.0, 3.0, 3.0)
+
+        assert add_points(builder, path) == len(TOPICS)
+
+        g = builder.model.graph
+        ns = builder.building_ns
+        oat = ns["campus_bldg_rtu1_OAT"]
+        assert (oat, RDF.type, BRICK.Outside_Air_Temperature_Sensor) in g
+        assert (oat, QUDT.hasUnit, UNIT.DEG_F) in g
+        assert (ns["rtu1"], BRICK.hasPoint, oat) in g
+        assert (
+            ns["zone1"],
+            BRICK.hasPoint,
+            ns["campus_bldg_rtu1_ZoneTemperature"],
+        ) in g
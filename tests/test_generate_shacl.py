@@ -0,0 +1,83 @@
+"""
+Tests for generating SHACL shapes from templates
+"""
+
+import shutil
+from importlib.resources import files
+
+import pytest
+from rdflib.compare import isomorphic
+
+import BrickModelInterface.generate_shacl as generate_shacl
+from BrickModelInterface import SHACLHandler
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    """Copy of the s223 templates that tests can modify."""
+    path = tmp_path / "templates"
+    shutil.copytree(str(files("BrickModelInterface").joinpath("s223-templates")), path)
+    return path
+
+
+@pytest.fixture
+def yaml_loads(monkeypatch):
+    """Count the template files parsed."""
+    loads = []
+    safe_load = generate_shacl.yaml.safe_load
+
+    def counting_safe_load(stream):
+        loads.append(getattr(stream, "name", None))
+        return safe_load(stream)
+
+    monkeypatch.setattr(generate_shacl.yaml, "safe_load", counting_safe_load)
+    return loads
+
+
+class TestSHACLHandler:
+    """Test cases for SHACL shape generation."""
+
+    def test_cached_shapes(self, template_dir, tmp_path, yaml_loads):
+        """Test that templates are parsed once, and not at all for cached shapes."""
+        cache_dir = tmp_path / "cache"
+        generated = SHACLHandler(template_dir, cache_dir=cache_dir)
+        generated.generate_shapes()
+        assert len(yaml_loads) == 2
+
+        cached = SHACLHandler(template_dir, cache_dir=cache_dir)
+        cached.generate_shapes()
+
+        assert len(yaml_loads) == 2
+        assert len(cached.shapes_graph) > 0
+        assert isomorphic(cached.shapes_graph, generated.shapes_graph)
+        assert cached.nodes_templates_names == generated.nodes_templates_names
+        assert cached.relations_templates_names == generated.relations_templates_names
+
+    def test_template_change(self, template_dir, tmp_path, yaml_loads):
+        """Test that changing a template file generates the shapes again."""
+        cache_dir = tmp_path / "cache"
+        SHACLHandler(template_dir, cache_dir=cache_dir).generate_shapes()
+        with open(template_dir / "nodes.yml", "a") as f:
+            f.write("\n# changed\n")
+
+        SHACLHandler(template_dir, cache_dir=cache_dir).generate_shapes()
+
+        assert len(yaml_loads) == 4
+        assert len(list(cache_dir.glob("*.ttl"))) == 2
+
+    def test_code_change(self, template_dir, tmp_path, monkeypatch):
+        """Test that the cache version and shape code source are in the cache key."""
+        handler = SHACLHandler(template_dir, cache_dir=tmp_path / "cache")
+        fingerprints = {handler._templates_fingerprint()}
+        monkeypatch.setattr(
+            generate_shacl,
+            "SHAPES_CACHE_VERSION",
+            generate_shacl.SHAPES_CACHE_VERSION + 1,
+        )
+        fingerprints.add(handler._templates_fingerprint())
+        monkeypatch.setattr(
+            generate_shacl, "SHAPES_CACHE_MODULES", ["generate_shacl.py"]
+        )
+        fingerprints.add(handler._templates_fingerprint())
+
+        assert len(fingerprints) == 3
@@ -0,0 +1,112 @@
+"""
+Tests for uploading dashboards to a mock Grafana server
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from grafanalib.core import Dashboard
+
+from BrickModelInterface import DashboardUploader
+
+
+class MockGrafanaHandler(BaseHTTPRequestHandler):
+    """Records dashboard uploads, answering 503 while the server has failures left."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers["Authorization"], body))
+            failing = server.failures.get(body["dashboard"]["title"], 0)
+            if failing:
+                server.failures[body["dashboard"]["title"]] = failing - 1
+        self.send_response(503 if failing else 200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"status": "success"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def grafana_server():
+    """Mock Grafana HTTP server running in a thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGrafanaHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failures = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def uploader(server, **kwargs):
+    """Uploader for the mock server with fast retries."""
+    return DashboardUploader(
+        f"http://127.0.0.1:{server.server_port}/", "key", backoff=0, **kwargs
+    )
+
+
+def dashboards(count, description="v1"):
+    """Dashboards named building0..building{count - 1}."""
+    return [
+        Dashboard(title=f"building{i}", description=description) for i in range(count)
+    ]
+
+
+class TestDashboardUploader:
+    """Test cases for DashboardUploader."""
+
+    def test_upload(self, grafana_server):
+        """Test that every dashboard is posted to the dashboard API with the API key."""
+        results = uploader(grafana_server, workers=3).upload(dashboards(5))
+
+        assert list(results["status"]) == ["uploaded"] * 5
+        assert len(grafana_server.requests) == 5
+        path, authorization, body = grafana_server.requests[0]
+        assert path == "/api/dashboards/db"
+        assert authorization == "Bearer key"
+        assert body["overwrite"] is True
+
+    def test_skip_unchanged(self, grafana_server, tmp_path):
+        """Test that only changed dashboards are uploaded again, across uploaders."""
+        state_file = tmp_path / "uploads.json"
+        uploader(grafana_server, state_file=state_file).upload(dashboards(3))
+
+        changed = dashboards(3)
+        changed[1].description = "v2"
+        results = uploader(grafana_server, state_file=state_file).upload(changed)
+
+        assert list(results["status"]) == ["unchanged", "unchanged", "uploaded"]
+        assert [
+            body["dashboard"]["title"] for _, _, body in grafana_server.requests[3:]
+        ] == ["building1"]
+
+    def test_retry(self, grafana_server, tmp_path):
+        """Test that unavailable responses are retried, and failures uploaded later."""
+        grafana_server.failures = {"building0": 2, "building1": 5}
+        state_file = tmp_path / "uploads.json"
+        results = uploader(grafana_server, retries=2, state_file=state_file).upload(
+            dashboards(2)
+        )
+
+        assert list(results["status"]) == ["uploaded", "failed"]
+        assert results["status_code"].tolist()[1] == 503
+        assert json.loads(state_file.read_text()).keys() == {"building0"}
+
+        grafana_server.failures = {}
+        results = uploader(grafana_server, state_file=state_file).upload(dashboards(2))
+        assert list(results["status"]) == ["unchanged", "uploaded"]
+
+    def test_duplicate_dashboards(self, grafana_server):
+        """Test that dashboards with the same title are rejected before uploading."""
+        with pytest.raises(ValueError, match="building1"):
+            uploader(grafana_server).upload(dashboards(3) + dashboards(2)[1:])
+
+        assert grafana_server.requests == []
@@ -0,0 +1,103 @@
+"""
+Tests for adding points from a point mapping file
+"""
+
+import pandas as pd
+import pytest
+from rdflib import Literal
+
+from BrickModelInterface import add_points
+from BrickModelInterface.namespaces import BRICK, QUDT, RDF, REF, S223, UNIT
+from BrickModelInterface.utils import add_brick_inverse_relations
+
+
+@pytest.fixture
+def builder(make_builder):
+    """Builder of the shared zones and equipment with its inverse relations added."""
+    builder = make_builder()
+    add_brick_inverse_relations(builder.model.graph)
+    return builder
+
+
+class TestAddPoints:
+    """Test cases for add_points."""
+
+    def test_brick_points(self, builder, mapping_file):
+        """Test that points are typed, attached and referenced."""
+        add_points(builder, mapping_file)
+        g = builder.model.graph
+        ns = builder.building_ns
+        zone_temp = ns["campus_bldg_zone1_ZoneTemperature"]
+        damper = ns["campus_bldg_hvac1_DamperCommand"]
+        status = ns["campus_bldg_hvac1_Status"]
+
+        assert (zone_temp, RDF.type, BRICK.Zone_Air_Temperature_Sensor) in g
+        assert (ns["zone1"], BRICK.hasPoint, zone_temp) in g
+        assert (ns["hvac1"], BRICK.hasPoint, damper) in g
+        assert (ns["hvac1"], BRICK.hasPoint, status) in g
+        assert (zone_temp, QUDT.hasUnit, UNIT.DEG_F) in g
+        assert (damper, QUDT.hasUnit, UNIT.PERCENT) in g
+        assert g.value(status, QUDT.hasUnit) is None
+        assert (
+            damper + "_external_reference",
+            REF.hasTopic,
+            Literal("campus/bldg/hvac1/DamperCommand"),
+        ) in g
+
+    def test_s223_points(self, builder, mapping_file):
+        """Test that 223 points are all attached to the zone."""
+        add_points(builder, mapping_file, ontology="s223")
+        g = builder.model.graph
+        ns = builder.building_ns
+
+        assert len(list(g.objects(ns["zone1"], S223.hasPoint))) == 4
+        assert (ns["campus_bldg_hvac1_Status"], RDF.type, S223.Status) in g
+
+    def test_feeds_without_inverse_relations(self, make_builder, mapping_file):
+        """Test that equipment points are attached using brick:feeds alone."""
+        builder = make_builder(mapping_file)
+
+        ns = builder.building_ns
+        assert (
+            ns["hvac1"],
+            BRICK.hasPoint,
+            ns["campus_bldg_hvac1_Status"],
+        ) in builder.model.graph
+
+    def test_zone_without_single_feeder(self, builder, points, tmp_path, capsys):
+        """Test that zones with no or several feeders are reported once and skipped."""
+        builder.add_zone("zone3")
+        builder.add_zone("zone4")
+        builder.add_hvac("hvac3", "zone4", 10.0, 10.0, 3.0, 3.0)
+        builder.add_hvac("hvac4", "zone4", 10.0, 10.0, 3.0, 3.0)
+        points = [
+            dict(points[2], topic_name=f"campus/bldg/{zone}/{i}", zone_id=zone)
+            for zone in ["zone1", "zone3", "zone4"]
+            for i in range(2)
+        ]
+        path = tmp_path / "points.csv"
+        pd.DataFrame(points).to_csv(path, index=False)
+        capsys.readouterr()
+
+        add_points(builder, path)
+
+        output = capsys.readouterr().out
+        assert output.count("zone3: no equipment feeds the zone") == 1
+        assert output.count("zone4: fed by multiple equipment") == 1
+        g = builder.model.graph
+        assert len(list(g.subjects(REF.hasTopic, None))) == 2
+        assert len(list(g.objects(builder.building_ns["hvac1"], BRICK.hasPoint))) == 2
+
+    @pytest.mark.parametrize("ontology", ["brick", "s223"])
+    def test_chunked_matches_single_read(
+        self, make_builder, mapping_file, ontology, capsys
+    ):
+        """Test that streaming the file in chunks adds the same triples."""
+        graphs = []
+        for chunksize in [None, 2]:
+            builder = make_builder()
+            assert add_points(builder, mapping_file, ontology, chunksize=chunksize) == 5
+            graphs.append(set(builder.model.graph))
+
+        assert graphs[0] == graphs[1]
+        assert "Read 5 rows, added 5 points" in capsys.readouterr().out
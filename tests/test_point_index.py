@@ -0,0 +1,45 @@
+"""
+Tests for the topic to point reverse lookup index
+"""
+
+import pytest
+
+from BrickModelInterface import PointIndex, SQLitePointIndex
+from BrickModelInterface.namespaces import BRICK, UNIT
+
+
+class TestPointIndex:
+    """Test cases for PointIndex and SQLitePointIndex."""
+
+    @pytest.mark.parametrize("backend", ["dict", "sqlite"])
+    def test_lookup(self, model_file, point_model, tmp_path, backend):
+        """Test that topics resolve to their point, class, unit and zone."""
+        ns = point_model.building_ns
+        index = PointIndex(model_file)
+        if backend == "sqlite":
+            index = index.to_sqlite(str(tmp_path / "index.db"))
+
+        assert len(index) == 5
+        zone_temp = index["campus/bldg/zone1/ZoneTemperature"]
+        assert zone_temp.point == str(ns["campus_bldg_zone1_ZoneTemperature"])
+        assert zone_temp.point_class == str(BRICK.Zone_Air_Temperature_Sensor)
+        assert zone_temp.unit == str(UNIT.DEG_F)
+        assert zone_temp.zone == str(ns["zone1"])
+        status = index["campus/bldg/hvac1/Status"]
+        assert status.unit is None
+        assert status.zone == str(ns["zone1"])
+        assert "campus/bldg/hvac1/Unknown" not in index
+        with pytest.raises(KeyError):
+            index["campus/bldg/hvac1/Unknown"]
+
+    def test_refresh(self, model_file, tmp_path):
+        """Test that refreshing from an empty model drops the old entries."""
+        empty_model = tmp_path / "empty.ttl"
+        empty_model.write_text("")
+        index = SQLitePointIndex(str(tmp_path / "index.db"), model_file)
+        assert len(index) == 5
+
+        index.refresh(str(empty_model))
+
+        assert len(index) == 0
+        assert index.get("campus/bldg/zone1/ZoneTemperature") is None
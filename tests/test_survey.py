@@ -0,0 +1,370 @@
+"""
+Tests for reading metadata surveys into models
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from rdflib import Graph, Literal
+from rdflib.compare import isomorphic
+
+from BrickModelInterface import BuildingMetadataLoader, SurveyGenerator, SurveyReader
+from BrickModelInterface.survey_container import pack_survey, unpack_survey
+
+DEMO_SURVEY = (
+    Path(__file__).parent.parent
+    / "tutorial"
+    / "metadata-survey-hpflex"
+    / "hpflex_demo"
+    / "bldg1"
+)
+
+
+@pytest.fixture
+def survey_dir(tmp_path):
+    """Copy of the filled out demo survey that tests can modify."""
+    return Path(shutil.copytree(DEMO_SURVEY, tmp_path / "bldg1"))
+
+
+class TestSurveyReader:
+    """Test cases for SurveyReader."""
+
+    def test_sharded_build_matches_serial(self, survey_dir):
+        """Test that building zones in worker processes gives the same graph."""
+        serial = SurveyReader(str(survey_dir))
+        serial.create_model()
+
+        sharded = SurveyReader(str(survey_dir))
+        sharded.create_model(workers=2)
+
+        assert set(sharded.graph) == set(serial.graph)
+
+    def test_virtual_inverse_model_output(self, survey_dir, tmp_path):
+        """Test that a model with virtual inverse relations gives the same output."""
+        reader = SurveyReader(str(survey_dir))
+        reader.create_model()
+        materialized_file = tmp_path / "materialized.ttl"
+        virtual_file = tmp_path / "virtual.ttl"
+        reader.builder.save_model(str(materialized_file))
+        model_size = len(reader.builder.model.graph)
+        reader.builder.save_model(str(virtual_file), virtual_inverse_relations=True)
+
+        assert len(reader.builder.model.graph) == model_size
+        assert len(Graph().parse(virtual_file)) < model_size
+        materialized = BuildingMetadataLoader(str(materialized_file), "brick")
+        virtual = BuildingMetadataLoader(
+            str(virtual_file), "brick", virtual_inverse_relations=True
+        )
+        assert virtual.get_complete_output() == materialized.get_complete_output()
+
+    def test_validation_reports_every_empty_field(self, survey_dir):
+        """Test that all rows with empty values are reported in one error."""
+        zones_csv = survey_dir / "zones" / "zones.csv"
+        lines = zones_csv.read_text().splitlines()
+        lines[1] = lines[1].replace("DEG_F", " N/A ")
+        lines[3] = lines[3].replace("0.5,0.5", ",")
+        lines.append(",,,,,,,")
+        zones_csv.write_text("\n".join(lines) + "\n")
+
+        with pytest.raises(ValueError) as excinfo:
+            SurveyReader(str(survey_dir)).create_model()
+
+        message = str(excinfo.value)
+        assert "row 2: temperature_unit" in message
+        assert "row 4: setpoint_deadband, tolerance" in message
+        assert "row 3" not in message and "row 5" not in message
+
+    def test_validation_skips_empty_rows(self, survey_dir):
+        """Test that empty rows and empty NOAA stations are allowed."""
+        zones_csv = survey_dir / "zones" / "zones.csv"
+        zones_csv.write_text(zones_csv.read_text() + ",,,,,,,\n")
+
+        reader = SurveyReader(str(survey_dir))
+
+        assert reader.site_info["noaa_station"] == ""
+        assert [zone["zone_id"] for zone in reader._load_zones()] == [
+            "bldg1_zone1",
+            "bldg1_zone2",
+            "bldg1_zone3",
+        ]
+
+    def test_incremental_build_matches_full_build(self, survey_dir, tmp_path, capsys):
+        """Test that patching changed zones into the model gives the full rebuild."""
+        output_file = tmp_path / "model.ttl"
+        SurveyReader(str(survey_dir)).create_model(str(output_file))
+        assert not (tmp_path / "model.ttl.manifest.json").exists()
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert (tmp_path / "model.ttl.manifest.json").exists()
+
+        windows_csv = survey_dir / "windows" / "bldg1_zone3_windows.csv"
+        windows_csv.write_text(
+            windows_csv.read_text().replace("window3_3", "window3_4")
+        )
+        spaces_csv = survey_dir / "spaces" / "bldg1_zone1_spaces.csv"
+        spaces_csv.write_text(spaces_csv.read_text().replace("1300", "1400"))
+        capsys.readouterr()
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert "Rebuilt 2 of 3 zones" in capsys.readouterr().out
+
+        full_file = tmp_path / "full.ttl"
+        SurveyReader(str(survey_dir)).create_model(str(full_file))
+        assert set(Graph().parse(output_file)) == set(Graph().parse(full_file))
+
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert "Rebuilt 0 of 3 zones" in capsys.readouterr().out
+
+    def test_incremental_build_removes_zones(self, survey_dir, tmp_path, capsys):
+        """Test that removing a zone keeps the triples of the site and other zones."""
+        # zone3 shares a space with zone1, so removing zone3 must keep the space
+        spaces_csv = survey_dir / "spaces" / "bldg1_zone3_spaces.csv"
+        spaces_csv.write_text(
+            spaces_csv.read_text() + "space_1_1,bldg1_zone3,1300,FT2\n"
+        )
+        output_file = tmp_path / "model.ttl"
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        manifest = json.loads((tmp_path / "model.ttl.manifest.json").read_text())
+        assert set(manifest["zones"]["bldg1_zone1"]) == {"hash", "triples"}
+
+        zones_csv = survey_dir / "zones" / "zones.csv"
+        lines = zones_csv.read_text().splitlines()
+        zones_csv.write_text(
+            "\n".join(
+                line for line in lines if not line.startswith("tstat_bldg1_zone3")
+            )
+            + "\n"
+        )
+        capsys.readouterr()
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert "removed 1 zones" in capsys.readouterr().out
+
+        full_file = tmp_path / "full.ttl"
+        SurveyReader(str(survey_dir)).create_model(str(full_file))
+        assert isomorphic(Graph().parse(output_file), Graph().parse(full_file))
+
+    def test_incremental_build_falls_back_to_full_build(
+        self, survey_dir, tmp_path, capsys
+    ):
+        """Test that HVAC changes and missing manifests rebuild the full model."""
+        output_file = tmp_path / "model.ttl"
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert "No saved model manifest found" in capsys.readouterr().out
+
+        hvac_csv = survey_dir / "hvac" / "hvac_units.csv"
+        hvac_csv.write_text(hvac_csv.read_text().replace("2.94", "3.1"))
+        SurveyReader(str(survey_dir)).create_model(str(output_file), incremental=True)
+        assert "rebuilding the full model" in capsys.readouterr().out
+        assert (None, None, Literal(3.1)) in Graph().parse(output_file)
+
+    def test_reused_reader_reads_edited_config(self, survey_dir, tmp_path, capsys):
+        """Test that a reused reader hashes the config as it is at build time."""
+        output_file = tmp_path / "model.ttl"
+        reader = SurveyReader(str(survey_dir))
+        reader.create_model(str(output_file), incremental=True)
+
+        config_json = survey_dir / "config.json"
+        config = json.loads(config_json.read_text())
+        config["hvac_type"] = "vav"
+        config_json.write_text(json.dumps(config))
+        capsys.readouterr()
+        reader.create_model(str(output_file), incremental=True)
+        assert "config or HVAC units changed" in capsys.readouterr().out
+        assert reader.config["hvac_type"] == "vav"
+
+    def test_packed_survey_matches_directory(self, survey_dir, tmp_path):
+        """Test that a packed survey builds the same model and unpacks the same."""
+        container_file = tmp_path / "bldg1.sqlite"
+        pack_survey(survey_dir, container_file)
+
+        from_directory = SurveyReader(str(survey_dir))
+        from_directory.create_model()
+        from_container = SurveyReader(str(container_file))
+        from_container.create_model()
+        assert set(from_container.graph) == set(from_directory.graph)
+
+        unpacked_dir = tmp_path / "unpacked"
+        unpack_survey(container_file, unpacked_dir)
+        for path in survey_dir.rglob("*.csv"):
+            unpacked = pd.read_csv(
+                unpacked_dir / path.relative_to(survey_dir),
+                dtype=str,
+                keep_default_na=False,
+            )
+            pd.testing.assert_frame_equal(
+                unpacked, pd.read_csv(path, dtype=str, keep_default_na=False)
+            )
+
+    def test_iter_loaders(self, survey_dir):
+        """Test that the zone generators yield the rows of each zone in order."""
+        reader = SurveyReader(str(survey_dir))
+
+        contents = list(reader.iter_zone_contents(read_ahead=2))
+
+        assert [zone["zone_id"] for zone, _, _ in contents] == [
+            "bldg1_zone1",
+            "bldg1_zone2",
+            "bldg1_zone3",
+        ]
+        for zone, spaces, windows in contents:
+            assert spaces == list(reader.iter_spaces(zone["zone_id"], chunksize=1))
+            assert windows == list(reader.iter_windows(zone["zone_id"], chunksize=1))
+        assert [len(windows) for _, _, windows in contents] == [1, 2, 3]
+        assert list(reader.iter_zones(chunksize=2)) == [zone for zone, _, _ in contents]
+        assert len(list(reader.iter_hvac(chunksize=1))) == 3
+
+    def test_chunked_validation_reports_every_chunk(self, survey_dir):
+        """Test that rows read in chunks are reported in one error by file row."""
+        zones_csv = survey_dir / "zones" / "zones.csv"
+        zones_csv.write_text(
+            zones_csv.read_text()
+            .replace("tstat_bldg1_zone1", "")
+            .replace("tstat_bldg1_zone3", "")
+        )
+
+        with pytest.raises(ValueError, match="row 2: tstat_id\nrow 4: tstat_id"):
+            next(SurveyReader(str(survey_dir)).iter_zones(chunksize=2))
+
+    def test_validation_before_building(self, survey_dir, monkeypatch):
+        """Test that empty HVAC values are reported before any zone is added."""
+        hvac_csv = survey_dir / "hvac" / "hvac_units.csv"
+        hvac_csv.write_text(hvac_csv.read_text().replace("2.94", "", 1))
+        added_zones = []
+        monkeypatch.setattr(
+            SurveyReader,
+            "_add_zone",
+            lambda self, builder, zone, *args: added_zones.append(zone),
+        )
+
+        with pytest.raises(ValueError, match="HVAC rows have empty values"):
+            SurveyReader(str(survey_dir)).create_model()
+
+        assert added_zones == []
+
+    def test_read_ahead_matches_serial_read(self, survey_dir):
+        """Test that reading zones ahead in threads gives the same graph."""
+        serial = SurveyReader(str(survey_dir))
+        serial.create_model(read_ahead=0)
+
+        read_ahead = SurveyReader(str(survey_dir))
+        read_ahead.create_model(read_ahead=4)
+
+        assert set(read_ahead.graph) == set(serial.graph)
+
+
+class TestSurveyGenerator:
+    """Test cases for SurveyGenerator."""
+
+    def test_packed_template_matches_directory(self, tmp_path):
+        """Test that the packed template has the same tables as the directory."""
+        zones = [(2, 3), (1, 0)]
+        SurveyGenerator("site", "bldg", "hp-rtu").easy_config(zones, tmp_path / "dir")
+        SurveyGenerator("site", "bldg", "hp-rtu").easy_config(
+            zones, tmp_path / "packed", packed=True
+        )
+
+        container_file = tmp_path / "packed" / "site" / "bldg.sqlite"
+        unpack_survey(container_file, tmp_path / "unpacked")
+        survey_dir = tmp_path / "dir" / "site" / "bldg"
+        for path in survey_dir.rglob("*.*"):
+            assert (
+                tmp_path / "unpacked" / path.relative_to(survey_dir)
+            ).read_text() == path.read_text()
+
+        with pytest.raises(FileExistsError):
+            SurveyGenerator("site", "bldg", "hp-rtu").easy_config(
+                zones, tmp_path / "packed", packed=True
+            )
+
+    def test_batch_reports_failures_without_stopping(self, tmp_path, capsys):
+        """Test that a batch generates every building and reports existing ones."""
+        buildings = pd.DataFrame(
+            [
+                {
+                    "site_id": "site",
+                    "building_id": "bldg1",
+                    "zone_count": 2,
+                    "space_count": 1,
+                    "window_count": 2,
+                },
+                {
+                    "site_id": "site",
+                    "building_id": "bldg2",
+                    "zone_count": 1,
+                    "space_count": 2,
+                    "window_count": 0,
+                },
+                {
+                    "site_id": "site",
+                    "building_id": "bldg2",
+                    "zone_count": 1,
+                    "space_count": 1,
+                    "window_count": 1,
+                },
+            ]
+        )
+        SurveyGenerator("site", "bldg2", "hp-rtu").easy_config([(1, 1)], tmp_path)
+
+        results = SurveyGenerator.generate_batch(buildings, tmp_path, workers=2)
+
+        assert list(results["building_id"]) == ["bldg1", "bldg2"]
+        assert results["error"].iloc[0] is None
+        assert results["error"].iloc[1].startswith("FileExistsError")
+        assert "Generated 1 of 2 surveys" in capsys.readouterr().out
+        zones = pd.read_csv(tmp_path / "site" / "bldg1" / "zones" / "zones.csv")
+        assert list(zones["zone_id"]) == ["bldg1_zone1", "bldg1_zone2"]
+        windows = pd.read_csv(
+            tmp_path / "site" / "bldg1" / "windows" / "bldg1_zone2_windows.csv"
+        )
+        assert list(windows["window_id"]) == ["window2_1", "window2_2"]
+
+    def test_batch_reports_bad_rows_per_building(self, tmp_path):
+        """Test that a building with a blank count fails without stopping the batch."""
+        buildings = pd.DataFrame(
+            [
+                {
+                    "site_id": "site",
+                    "building_id": "b1",
+                    "space_count": 1,
+                    "window_count": 1,
+                },
+                {
+                    "site_id": "site",
+                    "building_id": "b2",
+                    "space_count": None,
+                    "window_count": 1,
+                },
+            ]
+        )
+
+        results = SurveyGenerator.generate_batch(buildings, tmp_path)
+
+        assert results["error"].iloc[0] is None
+        assert results["error"].iloc[1].startswith("IntCastingNaNError")
+        assert (tmp_path / "site" / "b1" / "zones" / "zones.csv").exists()
+        assert not (tmp_path / "site" / "b2").exists()
+
+    def test_batch_matches_easy_config(self, tmp_path):
+        """Test that batch generated surveys are the same as easy_config surveys."""
+        buildings = pd.DataFrame(
+            [
+                {
+                    "site_id": "site",
+                    "building_id": "bldg",
+                    "space_count": 2,
+                    "window_count": 1,
+                    "system_of_units": "SI",
+                }
+            ]
+        )
+        SurveyGenerator.generate_batch(buildings, tmp_path / "batch", packed=True)
+        SurveyGenerator("site", "bldg", "hp-rtu", "SI").easy_config(
+            [(2, 1)], tmp_path / "single", packed=True
+        )
+
+        batch = SurveyReader(str(tmp_path / "batch" / "site" / "bldg.sqlite"))
+        single = SurveyReader(str(tmp_path / "single" / "site" / "bldg.sqlite"))
+        assert batch.config == single.config
+        for table, frame in single.container_tables.items():
+            pd.testing.assert_frame_equal(batch.container_tables[table], frame)
@@ -0,0 +1,75 @@
+"""
+Tests for converting streamed point data to SI units
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from BrickModelInterface import UnitNormalizer, convert_units
+
+RECORDS = [
+    ("campus/bldg/zone1/ZoneTemperature", "2024-01-01 00:00", 68.0),
+    ("campus/bldg/hvac1/DamperCommand", "2024-01-01 00:00", 40.0),
+    ("campus/bldg/zone1/ZoneTemperature", "2024-01-01 00:01", 70.0),
+    ("campus/bldg/unknown/Point", "2024-01-01 00:01", 1.0),
+]
+
+
+@pytest.fixture(scope="module")
+def normalizer(point_model):
+    """Normalizer over a model with temperature, percent and unitless points."""
+    return UnitNormalizer(point_model.model.graph)
+
+
+class TestUnitNormalizer:
+    """Test cases for UnitNormalizer."""
+
+    def test_generator_input(self, normalizer):
+        """Test that generator input is batched and converted like convert_units."""
+        batches = list(
+            normalizer.normalize((record for record in RECORDS), batch_size=3)
+        )
+
+        assert [len(batch) for batch in batches] == [3, 1]
+        converted = pd.concat(batches, ignore_index=True)
+        assert converted["value"].iloc[0] == pytest.approx(
+            convert_units(68.0, "DEG_F", "DEG_C")
+        )
+        assert converted["value"].iloc[2] == pytest.approx(21.111111)
+        assert converted["unit"].iloc[0] == "http://qudt.org/vocab/unit/DEG_C"
+        assert converted["value"].iloc[1] == 40.0
+        assert converted["unit"].iloc[1] == "http://qudt.org/vocab/unit/PERCENT"
+        assert converted["value"].iloc[3] == 1.0
+        assert converted["unit"].iloc[3] is None
+
+    def test_array_input_matches_generator(self, normalizer):
+        """Test that dataframe and structured array input give the same result."""
+        expected = pd.concat(normalizer.normalize(iter(RECORDS)), ignore_index=True)
+        frame = pd.DataFrame(RECORDS, columns=["topic", "timestamp", "value"])
+        array = np.array(
+            RECORDS, dtype=[("topic", object), ("timestamp", object), ("value", float)]
+        )
+
+        for records in [frame, array]:
+            converted = pd.concat(
+                normalizer.normalize(records, batch_size=2), ignore_index=True
+            )
+            pd.testing.assert_frame_equal(converted, expected)
+
+    def test_missing_topics_pass_through(self, normalizer):
+        """Test that rows without a topic are not converted."""
+        records = [
+            ("campus/bldg/zone1/ZoneTemperature", "2024-01-01 00:00", 68.0),
+            (None, "2024-01-01 00:00", 5.0),
+        ]
+        converted = pd.concat(normalizer.normalize(iter(records)), ignore_index=True)
+
+        assert converted["value"].iloc[1] == 5.0
+        assert converted["unit"].iloc[1] is None
+
+        converted = pd.concat(
+            normalizer.normalize(iter([(None, "2024-01-01 00:00", 5.0)]))
+        )
+        assert converted["value"].tolist() == [5.0]
+        assert converted["unit"].tolist() == [None]
@@ -0,0 +1,217 @@
+"""
+Tests for the utils module.
+"""
+
+import gzip
+
+import pytest
+from rdflib import Dataset, Graph, Literal, Namespace, URIRef
+
+from BrickModelInterface.namespaces import BRICK, RDF, RDFS
+from BrickModelInterface.utils import (
+    UniqueURIAllocator,
+    add_brick_inverse_relations,
+    canonicalize_brick_relations,
+    create_uri_name_from_uris,
+    get_brick_inverse_relations,
+    get_prefixes,
+    rewrite_brick_inverse_query,
+    serialize_graph,
+)
+
+EX = Namespace("urn:example#")
+
+
+class TestInverseRelations:
+    """Test cases for Brick inverse relation helpers."""
+
+    def test_get_inverse_relations_does_not_modify_graph(self):
+        """Test that collecting inverses leaves the graph untouched."""
+        g = Graph()
+        g.add((EX.ahu, BRICK.feeds, EX.zone))
+        g.add((EX.ahu, BRICK.hasPoint, EX.sensor))
+
+        inverses = get_brick_inverse_relations(g)
+
+        assert len(g) == 2
+        assert inverses == {
+            (EX.zone, BRICK.isFedBy, EX.ahu),
+            (EX.sensor, BRICK.isPointOf, EX.ahu),
+        }
+
+    def test_add_inverse_relations(self):
+        """Test that inverses are added and unrelated triples are ignored."""
+        g = Graph()
+        g.add((EX.ahu, BRICK.feeds, EX.zone))
+        g.add((EX.ahu, RDF.type, BRICK.AHU))
+        g.add((EX.ahu, BRICK.value, Literal(1)))
+
+        add_brick_inverse_relations(g)
+
+        assert (EX.zone, BRICK.isFedBy, EX.ahu) in g
+        assert len(g) == 4
+
+    def test_existing_inverses_not_counted(self):
+        """Test that inverses already in the graph are not reported again."""
+        g = Graph()
+        g.add((EX.ahu, BRICK.feeds, EX.zone))
+        g.add((EX.zone, BRICK.isFedBy, EX.ahu))
+
+        assert get_brick_inverse_relations(g) == set()
+
+
+class TestVirtualInverseRelations:
+    """Test cases for canonical relations and inverse query rewriting."""
+
+    @pytest.fixture
+    def materialized_graph(self):
+        """Graph with inverse relations materialized."""
+        g = Graph()
+        g.bind("brick", BRICK)
+        g.add((EX.ahu, BRICK.feeds, EX.zone))
+        g.add((EX.space, BRICK.isPartOf, EX.zone))
+        g.add((EX.tstat, BRICK.hasLocation, EX.zone))
+        return add_brick_inverse_relations(g)
+
+    def test_canonicalize(self, materialized_graph):
+        """Test that only canonical directions remain, in a copy of the graph."""
+        materialized = set(materialized_graph)
+        canonical_graph = canonicalize_brick_relations(materialized_graph)
+
+        assert set(canonical_graph) == {
+            (EX.ahu, BRICK.feeds, EX.zone),
+            (EX.zone, BRICK.hasPart, EX.space),
+            (EX.tstat, BRICK.hasLocation, EX.zone),
+        }
+        assert set(materialized_graph) == materialized
+        assert dict(canonical_graph.namespaces())["brick"] == URIRef(BRICK)
+
+    def test_rewrite_leaves_canonical_predicates(self):
+        """Test that canonical predicates and similar names are not rewritten."""
+        query = "SELECT * WHERE { ?a brick:feeds ?b . ?c brick:isFedByX ?d }"
+        assert rewrite_brick_inverse_query(query) == query
+
+    def test_rewritten_query_matches_materialized(self, materialized_graph):
+        """Test that a rewritten query on a canonical graph gives the same results."""
+        query = get_prefixes(materialized_graph) + """
+            SELECT ?tstat ?hvac ?space WHERE {
+                ?tstat brick:hasLocation/brick:isFedBy ?hvac .
+                ?space brick:isPartOf ?zone .
+                ?tstat ^brick:isLocationOf ?zone .
+            }"""
+        expected = set(materialized_graph.query(query))
+
+        canonical_graph = canonicalize_brick_relations(materialized_graph)
+        assert set(canonical_graph.query(query)) != expected
+        assert (
+            set(canonical_graph.query(rewrite_brick_inverse_query(query))) == expected
+        )
+
+    def test_rewrite_skips_literals_and_comments(self):
+        """Test that inverse names in literals, comments and IRIs are kept."""
+        query = """SELECT * WHERE {
+                # brick:isFedBy is rewritten below
+                ?a brick:isFedBy ?b .
+                ?a rdfs:label "brick:isFedBy" .
+                ?b rdfs:comment 'see brick:isPartOf' .
+                ?b ex:ref <http://example.org/brick:isFedBy> .
+            }"""
+        canonical = f"(^<{BRICK.feeds}>)"
+        rewritten = rewrite_brick_inverse_query(query)
+        assert rewritten == query.replace("?a brick:isFedBy ?b", f"?a {canonical} ?b")
+
+    def test_rewrite_full_iri(self):
+        """Test that full inverse IRIs are rewritten like prefixed names."""
+        query = f"SELECT * WHERE {{ ?a <{BRICK.isPartOf}> ?b }}"
+        assert (
+            rewrite_brick_inverse_query(query)
+            == f"SELECT * WHERE {{ ?a (^<{BRICK.hasPart}>) ?b }}"
+        )
+
+
+class TestSerializeGraph:
+    """Test cases for streaming and compressed serialization."""
+
+    @pytest.fixture
+    def graph(self):
+        """Small graph with a literal that needs escaping."""
+        g = Graph()
+        g.add((EX.ahu, BRICK.feeds, EX.zone))
+        g.add((EX.ahu, RDF.type, BRICK.AHU))
+        g.add((EX.ahu, BRICK.value, Literal('line "one"\nline two')))
+        return g
+
+    @pytest.mark.parametrize("format", ["turtle", "nt"])
+    def test_roundtrip_gzip(self, graph, format, tmp_path):
+        """Test that a gzip compressed file parses back to the same graph."""
+        filename = tmp_path / f"model.{format}.gz"
+        serialize_graph(graph, filename, format=format, compression="gzip")
+
+        parsed = Graph()
+        with gzip.open(filename) as f:
+            parsed.parse(data=f.read(), format=format)
+        assert set(parsed) == set(graph)
+
+    def test_nquads_uses_graph_identifier(self, graph, tmp_path):
+        """Test that N-Quads rows of a plain graph are named by its identifier."""
+        filename = tmp_path / "model.nq"
+        serialize_graph(graph, filename, format="nquads")
+
+        lines = open(filename).read().splitlines()
+        assert len(lines) == 3
+        assert all(graph.identifier.n3() in line for line in lines)
+
+    def test_nquads_roundtrip(self, graph, tmp_path):
+        """Test that N-Quads rows parse back to the same triples and literals."""
+        graph.add((EX.ahu, RDFS.label, Literal("Air handler \\ 1", lang="en")))
+        graph.add((EX.ahu, BRICK.value, Literal(1.5)))
+        filename = tmp_path / "model.nq"
+        serialize_graph(graph, filename, format="nquads")
+
+        parsed = Dataset()
+        parsed.parse(filename, format="nquads")
+        assert {(s, p, o) for s, p, o, _ in parsed.quads()} == set(graph)
+
+    def test_invalid_compression(self, graph, tmp_path):
+        """Test that an unknown compression raises ValueError."""
+        with pytest.raises(ValueError, match="Invalid compression"):
+            serialize_graph(
+                graph, tmp_path / "model.nt", format="nt", compression="lzma"
+            )
+
+
+class TestUniqueURIAllocator:
+    """Test cases for counter based unique URI generation."""
+
+    def test_same_names_as_graph_probing(self):
+        """Test that the allocator mints the same names as probing the graph."""
+        probed = Graph()
+        probed.add((EX.shape_a, RDF.type, EX.Shape))
+        probed.add((EX.other, EX.ref, EX["shape_a-1"]))
+        allocated = Graph()
+        allocated += probed
+        allocator = UniqueURIAllocator(allocated)
+
+        names = [["shape", "a"], ["shape", "b"], ["shape", "a"], ["shape", "a"]]
+        expected = [create_uri_name_from_uris(probed, EX, n) for n in names]
+        result = [
+            create_uri_name_from_uris(allocated, EX, n, allocator=allocator)
+            for n in names
+        ]
+
+        assert result == expected
+        assert expected == [
+            EX["shape_a-2"],
+            EX.shape_b,
+            EX["shape_a-3"],
+            EX["shape_a-4"],
+        ]
+        assert set(allocated) == set(probed)
+
+    def test_nodes_added_outside_allocator(self):
+        """Test that nodes added to the graph after creation are not reused."""
+        g = Graph()
+        allocator = UniqueURIAllocator(g)
+        g.add((EX.shape, RDF.type, EX.Shape))
+
+        assert allocator.allocate(EX.shape) == EX["shape-1"]